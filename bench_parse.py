@@ -0,0 +1,68 @@
+# --------------------------
+# CPU time per ad page: html.parser full tree vs configured backend + scoped parse
+#
+#   python bench_parse.py saved_ads/*.html --repeat 20
+#
+# Every variant must produce exactly the same data dict as the current path
+# (html.parser, whole page); a mismatch is reported and exits non-zero.
+# --------------------------
+import argparse
+import sys
+import time
+from extraction import extract_vehicle
+from parsing import AD_PAGE_STRAINER, PARSER_BACKEND, make_soup
+
+AD_URL = "https://autostream.lk/listings/benchmark/"
+
+
+def variants():
+    out = [("html.parser / full page", "html.parser", None)]
+    if PARSER_BACKEND != "html.parser":
+        out.append((f"{PARSER_BACKEND} / full page", PARSER_BACKEND, None))
+    out.append(("html.parser / listing region", "html.parser", AD_PAGE_STRAINER))
+    if PARSER_BACKEND != "html.parser":
+        out.append((f"{PARSER_BACKEND} / listing region", PARSER_BACKEND, AD_PAGE_STRAINER))
+    return out
+
+
+def time_variant(extract, pages, backend, strainer, repeat):
+    results = []
+    start = time.process_time()
+    for _ in range(repeat):
+        results = [extract(make_soup(html, strainer, backend), AD_URL, {}) for html in pages]
+    elapsed = time.process_time() - start
+    return elapsed / (repeat * len(pages)), results
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Compare CPU time per ad across parser backends")
+    parser.add_argument("pages", nargs="+", help="saved ad page HTML files")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.pages:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+
+    print(f"📊 extract_vehicle over {len(pages)} pages x {args.repeat}")
+    ok = True
+    baseline_time, baseline = None, None
+    for label, backend, strainer in variants():
+        per_ad, results = time_variant(extract_vehicle, pages, backend, strainer, args.repeat)
+        if baseline is None:
+            baseline_time, baseline = per_ad, results
+        same = results == baseline
+        ok = ok and same
+        print(f"  {label:<32} {per_ad * 1000:8.2f} ms/ad  x{baseline_time / per_ad:5.2f}  "
+              f"{'identical' if same else '❌ DIFFERENT'}")
+        if not same:
+            for path, expected, got in zip(args.pages, baseline, results):
+                if expected != got:
+                    print(f"     first mismatch: {path}")
+                    break
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
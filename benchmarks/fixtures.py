@@ -0,0 +1,147 @@
+import json
+import os
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MANIFEST = "manifest.json"
+SITE = "https://autostream.lk"
+# Request fields that change per visit and must not be part of the lookup key
+VOLATILE_FIELDS = {"security", "nonce"}
+_SITE_RE = re.compile(r"https?://autostream\.lk")
+_SITE_JSON_RE = re.compile(r"https?:\\/\\/autostream\.lk")  # inside JSON strings
+
+
+# --------------------------
+# Manifest: request key -> stored response
+# --------------------------
+def request_key(method, url, data=None) -> str:
+    parts = urlsplit(url)
+    key = f"{method.upper()} {parts.path or '/'}"
+    if parts.query:
+        key += "?" + parts.query
+    if data:
+        items = data.items() if isinstance(data, dict) else parse_qsl(data)
+        fields = sorted((k, str(v)) for k, v in items if k not in VOLATILE_FIELDS)
+        key += " " + urlencode(fields)
+    return key
+
+
+class FixtureCorpus:
+    def __init__(self, directory=DEFAULT_FIXTURE_DIR):
+        self.directory = directory
+        path = os.path.join(directory, MANIFEST)
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def exists(self) -> bool:
+        return bool(self.entries)
+
+    def add(self, method, url, data, status, content_type, body: str, kind="page"):
+        key = request_key(method, url, data)
+        name = f"{len(self.entries):05d}.html"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            f.write(body)
+        self.entries[key] = {"file": name, "status": status, "content_type": content_type, "kind": kind, "url": url}
+
+    def save(self):
+        with open(os.path.join(self.directory, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+
+    def body(self, entry, base_url=None) -> str:
+        with open(os.path.join(self.directory, entry["file"]), encoding="utf-8") as f:
+            text = f.read()
+        if base_url:
+            text = _SITE_RE.sub(lambda m: base_url, text)
+            text = _SITE_JSON_RE.sub(lambda m: base_url.replace("/", "\\/"), text)
+        return text
+
+    def lookup(self, method, url, data=None):
+        return self.entries.get(request_key(method, url, data))
+
+    def of_kind(self, kind):
+        return [e for e in self.entries.values() if e["kind"] == kind]
+
+
+# --------------------------
+# Synthetic corpus in the site's markup, for boxes with no recording
+# --------------------------
+FUELS = ["Petrol", "Diesel", "Hybrid", "Electric"]
+BODIES = ["Sedan", "Hatchback", "SUV", "Van", "Pickup"]
+FEATURES = {
+    "Convenience": ["Air Conditioning", "Power Steering", "Keyless Entry", "Cruise Control"],
+    "Safety & Security": ["ABS", "Airbags", "Reverse Camera", "Traction Control"],
+    "Infotainment": ["Bluetooth", "Android Auto", "USB"],
+}
+
+
+def _ad_page(d, a):
+    year = 2005 + (d * 7 + a) % 19
+    items = "".join(
+        f'<div class="item"><div class="label-text">{label}</div><div class="value-text">{value}</div></div>'
+        for label, value in (
+            ("Body", BODIES[a % len(BODIES)]),
+            ("Mileage", f"{(a * 7919) % 200000:,} km"),
+            ("Fuel Type", FUELS[a % len(FUELS)]),
+            ("Engine (cc / k w)", f"{1000 + (a * 37) % 2000} cc"),
+        )
+    )
+    data = "".join(
+        f'<li class="data-list-item"><span class="item-label">{label}</span><span class="heading-font">{value}</span></li>'
+        for label, value in (
+            ("Year of Manufacture", year), ("Transmission", "Automatic" if a % 3 else "Manual"),
+            ("Exterior Color", "White"), ("District", "Colombo"), ("City", "Nugegoda"),
+        )
+    )
+    groups = "".join(
+        f'<div class="grouped_checkbox-3"><h4>{title}</h4><ul>'
+        + "".join(f"<li><i></i><span>{f}</span></li>" for f in feats[: 1 + (a % len(feats))])
+        + "</ul></div>"
+        for title, feats in FEATURES.items()
+    )
+    sold = '<div class="special-label h5">Sold</div>' if a % 5 == 0 else ""
+    filler = "".join(f'<div class="related"><a href="{SITE}/listings/other-{i}/">Related {i}</a><p>{"lorem ipsum " * 20}</p></div>' for i in range(30))
+    return f"""<!DOCTYPE html><html><head><title>Ad {d}-{a}</title>
+<link rel="stylesheet" href="{SITE}/style.css"><script>var stm = {{"ajaxurl": "{SITE}/wp-admin/admin-ajax.php"}};</script></head>
+<body><header class="header"><nav>{"".join(f'<a href="{SITE}/page-{i}/">Menu {i}</a>' for i in range(40))}</nav></header>
+<div class="container"><h1 class="listing-title">Vehicle {d}-{a} Model {year}</h1>
+<div class="price"><span class="heading-font">Rs. {(a * 104729) % 30000000 + 500000:,}</span></div>{sold}
+<div class="single-listing-attribute-boxes">{items}</div>
+<div class="stm-single-car-listing-data"><ul>{data}</ul></div>
+<div class="stm-single-listing-car-features">{groups}</div>
+<section class="seller-notes"><h2>Seller Notes</h2><p>Well maintained vehicle {d}-{a}. {"Full service history. " * 5}</p></section>
+<div class="stm-dealer-info"><h3>Dealer {d}</h3><div class="dealer-location">Colombo {d}</div>
+<a href="tel:+9477{d:07d}"></a></div>{filler}</div><footer>{"footer text " * 50}</footer></body></html>"""
+
+
+def _dealer_page(d, ads):
+    rows = "".join(
+        f'<div class="listing-list-loop"><a href="{SITE}/listings/vehicle-{d}-{a}/">Vehicle {d}-{a}</a>'
+        f'<div class="price">Rs. {a}</div></div>'
+        for a in range(ads)
+    )
+    return f"""<!DOCTYPE html><html><body><h1 class="page-title">Dealer {d}</h1>
+<div class="stm-dealer-info"><h3>Dealer {d}</h3><div class="dealer-location">Colombo {d}</div>
+<div class="dealer-working-hours">Mon-Sat 9.00-18.00</div><a href="mailto:dealer{d}@example.lk">dealer{d}@example.lk</a>
+<a href="tel:+9477{d:07d}">+94 77 {d:07d}</a></div>
+<div class="car-listing-row row row-3">{rows}</div>
+<p>Location: Colombo {d}</p><p>Sales Hours: 9-6</p></body></html>"""
+
+
+def build_synthetic(directory=DEFAULT_FIXTURE_DIR, dealers=5, ads_per_dealer=20) -> FixtureCorpus:
+    corpus = FixtureCorpus(directory)
+    corpus.entries = {}
+    rows = "".join(
+        f'<tr class="stm-single-dealer"><td class="dealer-info"><a class="h4" href="{SITE}/author/dealer-{d}/">Dealer {d}</a></td></tr>'
+        for d in range(dealers)
+    )
+    corpus.add("GET", f"{SITE}/dealers/", None, 200, "text/html", f"<html><body><table>{rows}</table></body></html>", "dealers")
+    for d in range(dealers):
+        corpus.add("GET", f"{SITE}/author/dealer-{d}/", None, 200, "text/html", _dealer_page(d, ads_per_dealer), "dealer")
+        for a in range(ads_per_dealer):
+            corpus.add("GET", f"{SITE}/listings/vehicle-{d}-{a}/", None, 200, "text/html", _ad_page(d, a), "ad")
+    corpus.save()
+    return corpus
@@ -0,0 +1,53 @@
+# --------------------------
+# Record dealer and listing pages once into a fixture corpus
+#
+#   python benchmarks/record_fixtures.py --dealers 5
+# --------------------------
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client  # noqa: E402
+import scraper  # noqa: E402
+from fixtures import DEFAULT_FIXTURE_DIR, FixtureCorpus  # noqa: E402
+from listings import collect_dealer_listings  # noqa: E402
+
+_kind = {"value": "page"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record autostream.lk pages for offline benchmarks")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument("--dealers", type=int, default=5, help="dealers to record")
+    parser.add_argument("--ads", type=int, help="ads to record per dealer (default: all)")
+    args = parser.parse_args()
+
+    corpus = FixtureCorpus(args.fixtures)
+    corpus.entries = {}
+
+    def record(method, url, kwargs, response):
+        corpus.add(method, url, kwargs.get("data"), response.status_code,
+                   response.headers.get("Content-Type", "text/html"), response.text, _kind["value"])
+
+    http_client.add_response_hook(record)
+
+    _kind["value"] = "dealers"
+    dealers = scraper.get_dealers()[: args.dealers]
+    for dealer_url in dealers:
+        _kind["value"] = "dealer"
+        soup, links, _ = collect_dealer_listings(dealer_url, "http")
+        _kind["value"] = "ad"
+        for link in list(dict.fromkeys(links))[: args.ads]:
+            url = link if link.startswith("http") else scraper.BASE_URL + link
+            try:
+                scraper.scrape_vehicle(url, {})
+            except Exception as e:
+                print(f"❌ Failed to record {url}: {e}")
+    corpus.save()
+    print(f"💾 Recorded {len(corpus.entries)} responses into {args.fixtures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# --------------------------
+# Local stand-in for autostream.lk that serves a fixture corpus
+#
+#   python benchmarks/replay_server.py --port 8765
+#   AUTOSTREAM_BASE_URL=http://127.0.0.1:8765 python main.py --no-merge
+# --------------------------
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fixtures import DEFAULT_FIXTURE_DIR, FixtureCorpus
+
+
+class ReplayServer:
+    def __init__(self, corpus: FixtureCorpus, host="127.0.0.1", port=0):
+        self.corpus = corpus
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, method, data=None):
+                entry = server.corpus.lookup(method, self.path, data)
+                if entry is None:
+                    self.send_error(404)
+                    return
+                body = server.corpus.body(entry, server.base_url).encode("utf-8")
+                self.send_response(entry["status"])
+                self.send_header("Content-Type", entry["content_type"])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._reply("GET")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self._reply("POST", self.rfile.read(length).decode("utf-8"))
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a recorded fixture corpus over HTTP")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    corpus = FixtureCorpus(args.fixtures)
+    if not corpus.exists():
+        raise SystemExit(f"No fixtures in {args.fixtures}; run record_fixtures.py or run_benchmarks.py --synthetic")
+    server = ReplayServer(corpus, port=args.port)
+    print(f"🧪 Replaying {len(corpus.entries)} responses at {server.base_url}")
+    server.httpd.serve_forever()
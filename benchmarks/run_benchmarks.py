@@ -0,0 +1,197 @@
+# --------------------------
+# Offline scraper benchmarks against a fixture corpus (no network needed)
+#
+#   python benchmarks/run_benchmarks.py --synthetic
+#   python benchmarks/run_benchmarks.py --json today.json --baseline last_week.json
+#
+# Measures end-to-end ads/sec through the local replay server, per-ad
+# parse time, dealer info extraction cost and save_to_excel time at
+# several row counts. With --baseline, exits 1 when any result is worse
+# than the baseline by more than --tolerance.
+# --------------------------
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+import scraper  # noqa: E402
+from extraction import extract_dealer_info_from_dealer_page  # noqa: E402
+from fetcher import AdaptiveRateLimit, set_rate_limiter  # noqa: E402
+from fixtures import DEFAULT_FIXTURE_DIR, FixtureCorpus, build_synthetic  # noqa: E402
+from normalize import NORMALIZE_BATCH_ROWS, normalize_batch  # noqa: E402
+from parsing import make_soup  # noqa: E402
+from record_store import RecordStore  # noqa: E402
+from replay_server import ReplayServer  # noqa: E402
+from writers import open_writer  # noqa: E402
+
+DEFAULT_SAVE_SIZES = (1000, 10000, 100000)
+
+# result name -> True when higher is better
+HIGHER_IS_BETTER = {"end_to_end_ads_per_sec": True}
+
+
+def bench_end_to_end(corpus, server, workers):
+    scraper.BASE_URL = server.base_url
+    # no throttling against the local replay server
+    set_rate_limiter(AdaptiveRateLimit(start_rate=1e6, min_rate=1e6, max_rate=1e6))
+    scraped = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        dealers = [d for d in scraper.get_dealers() if corpus.lookup("GET", d)]
+        start = time.perf_counter()
+        for dealer_url in dealers:
+            scraper.scrape_dealer(dealer_url, workers=workers, on_ad=scraped.append)
+        elapsed = time.perf_counter() - start
+    return {
+        "end_to_end_ads": len(scraped),
+        "end_to_end_seconds": elapsed,
+        "end_to_end_ads_per_sec": len(scraped) / elapsed if elapsed else 0.0,
+    }, scraped
+
+
+def bench_parse(corpus, repeat):
+    pages = [(e["url"], corpus.body(e)) for e in corpus.of_kind("ad")]
+    start = time.process_time()
+    for _ in range(repeat):
+        for url, html in pages:
+            scraper.parse_vehicle_page(html, url, {})
+    per_ad = (time.process_time() - start) / (repeat * len(pages))
+    return {"parse_ms_per_ad": per_ad * 1000}
+
+
+def bench_dealer_info(corpus, repeat):
+    soups = [make_soup(corpus.body(e)) for e in corpus.of_kind("dealer")]
+    start = time.process_time()
+    for _ in range(repeat):
+        for soup in soups:
+            extract_dealer_info_from_dealer_page(soup)
+    per_page = (time.process_time() - start) / (repeat * len(soups))
+    return {"dealer_info_ms_per_page": per_page * 1000}
+
+
+def _fresh(record):
+    # a copy with its own string objects, like a freshly parsed ad
+    return {k: (v + ".")[:-1] if isinstance(v, str) else v for k, v in record.items()}
+
+
+def bench_records(records, sizes):
+    # memory and header-order conversion: list of dicts vs columnar RecordStore
+    results = {}
+    for n in sizes:
+        source = itertools.islice(itertools.cycle(records), n)
+        tracemalloc.start()
+        dicts = [_fresh(r) for r in source]
+        results[f"records_dicts_{n}_mb"] = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        store = RecordStore(_fresh(r) for r in dicts)
+        results[f"records_store_{n}_mb"] = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in ([r.get(h, "") for h in main.HEADERS] for r in dicts):
+            pass
+        results[f"rows_dicts_{n}_seconds"] = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in store.rows(main.HEADERS):
+            pass
+        results[f"rows_store_{n}_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(0, n, NORMALIZE_BATCH_ROWS):
+            normalize_batch(dicts[i:i + NORMALIZE_BATCH_ROWS])
+        results[f"normalize_{n}_seconds"] = time.perf_counter() - start
+    return results
+
+
+def bench_save(records, sizes):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            rows = RecordStore(itertools.islice(itertools.cycle(records), n))
+            path = os.path.join(tmp, f"save_{n}.xlsx")
+            start = time.perf_counter()
+            main.save_to_excel(rows, path)
+            results[f"save_to_excel_{n}_seconds"] = time.perf_counter() - start
+
+            path = os.path.join(tmp, f"stream_{n}.csv")
+            start = time.perf_counter()
+            with open_writer(path, main.HEADERS) as writer:
+                for row in rows.rows(main.HEADERS):
+                    writer.write_values(row)
+            results[f"stream_csv_{n}_seconds"] = time.perf_counter() - start
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, value in results.items():
+        old = baseline.get(name)
+        if not old or name == "end_to_end_ads":
+            continue
+        if HIGHER_IS_BETTER.get(name):
+            worse = value < old * (1 - tolerance)
+        else:
+            worse = value > old * (1 + tolerance)
+        if worse:
+            regressions.append((name, old, value))
+    return regressions
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmarks")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument("--synthetic", action="store_true", help="(re)build a synthetic corpus first")
+    parser.add_argument("--workers", type=int, default=4, help="ad fetch workers for the end-to-end run")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions for the CPU benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SAVE_SIZES)), help="save_to_excel row counts")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    corpus = FixtureCorpus(args.fixtures)
+    if args.synthetic or not corpus.exists():
+        print(f"🧪 Building synthetic corpus in {args.fixtures}")
+        corpus = build_synthetic(args.fixtures)
+
+    results = {}
+    with ReplayServer(corpus) as server:
+        e2e, records = bench_end_to_end(corpus, server, args.workers)
+    results.update(e2e)
+    results.update(bench_parse(corpus, args.repeat))
+    results.update(bench_dealer_info(corpus, args.repeat))
+    if records:
+        sizes = [int(n) for n in args.sizes.split(",") if n]
+        results.update(bench_records(records, sizes))
+        results.update(bench_save(records, sizes))
+
+    print(f"\n📊 Benchmarks ({len(corpus.of_kind('dealer'))} dealers, {len(corpus.of_kind('ad'))} ads)")
+    for name, value in results.items():
+        print(f"   {name:<32} {value:>12.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, old, new in regressions:
+            print(f"❌ Regression: {name} {old:.3f} -> {new:.3f}")
+        if regressions:
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,152 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+import metrics
+
+DEFAULT_POOL_SIZE = 2
+
+# Resources Chrome should never download while expanding dealer pages
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+# --------------------------
+# Resolve chromedriver once per process
+# --------------------------
+def get_driver_path() -> str:
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+
+def launch_driver(headless: bool = True):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+        "profile.managed_default_content_settings.fonts": 2,
+    })
+    with metrics.timed("driver_launch"):
+        driver = webdriver.Chrome(service=Service(get_driver_path()), options=options)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"⚠️ Could not set blocked URLs: {e}")
+    return driver
+
+
+# --------------------------
+# Fixed-size pool of reusable Chrome instances
+# --------------------------
+class BrowserPool:
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, headless: bool = True):
+        self.size = size
+        self.headless = headless
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._drivers = []
+        self._closed = False
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed")
+            if self._created < self.size:
+                self._created += 1
+                launch = True
+            else:
+                launch = False
+        if not launch:
+            return self._idle.get()
+        try:
+            driver = launch_driver(self.headless)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._created -= 1
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def acquire(self):
+        driver = self._checkout()
+        try:
+            yield driver
+        except Exception:
+            # drop instances that died mid-use so the next caller gets a fresh one
+            try:
+                driver.current_url
+            except Exception:
+                self._discard(driver)
+                raise
+            self._idle.put(driver)
+            raise
+        else:
+            self._idle.put(driver)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            drivers, self._drivers = self._drivers, []
+            self._created = 0
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool(size: int = DEFAULT_POOL_SIZE) -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(size)
+    return _pool
+
+
+@atexit.register
+def close_browser_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
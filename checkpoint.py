@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+import time
+
+DEFAULT_JOURNAL_PATH = "crawl_checkpoint.jsonl"
+# Journal lines are buffered and written in batches
+FLUSH_EVERY = 50
+FLUSH_INTERVAL = 5.0  # seconds
+
+
+# --------------------------
+# Append-only JSONL journal of finished dealers and ads
+# (the records themselves live in the streaming output)
+# --------------------------
+class CheckpointJournal:
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, resume=False, before_flush=None):
+        self.path = path
+        self.done_dealers = set()
+        self.done_ads = set()
+        # called before journal lines hit the disk, so the output is always
+        # at least as far along as the journal says
+        self.before_flush = before_flush
+        if resume and os.path.exists(path):
+            self._load()
+        elif os.path.exists(path):
+            os.remove(path)
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._fh = open(path, "a", encoding="utf-8")
+        if self._fh.tell() and not self._ends_with_newline():
+            self._fh.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # torn last line from a crash; everything before it is intact
+                    continue
+                if "ad" in entry:
+                    self.done_ads.add(entry["ad"])
+                elif "dealer" in entry:
+                    self.done_dealers.add(entry["dealer"])
+        print(f"♻️ Resuming: {len(self.done_dealers)} dealers and {len(self.done_ads)} ads already done")
+
+    def ad_done(self, dealer_url, ad_url):
+        self.done_ads.add(ad_url)
+        self._append({"ad": ad_url, "dealer": dealer_url})
+
+    def dealer_done(self, dealer_url):
+        self.done_dealers.add(dealer_url)
+        self._append({"dealer": dealer_url})
+        self.flush(sync=True)
+
+    def _append(self, entry):
+        with self._lock:
+            self._buffer.append(json.dumps(entry, ensure_ascii=False))
+            due = (len(self._buffer) >= FLUSH_EVERY
+                   or time.monotonic() - self._last_flush >= FLUSH_INTERVAL)
+        if due:
+            self.flush()
+
+    def flush(self, sync=False):
+        if self.before_flush:
+            self.before_flush()
+        with self._lock:
+            if self._buffer:
+                self._fh.write("\n".join(self._buffer) + "\n")
+                self._buffer = []
+            self._fh.flush()
+            if sync:
+                os.fsync(self._fh.fileno())
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush(sync=True)
+        self._fh.close()
+
+    def finish(self):
+        # the crawl's output is saved; nothing left to resume
+        self._fh.close()
+        os.remove(self.path)
@@ -0,0 +1,424 @@
+# --------------------------
+# One entry point for every crawl scope
+#
+#   python cli.py site                         every dealer on the site
+#   python cli.py dealers URL... [--file F]    a list of dealer pages
+#   python cli.py dealer URL [--dealer-row]    a single dealer
+#   python cli.py ads URL... [--file F]        individual ad pages
+#   python cli.py coordinate [URL...]          queue a crawl and serve it to workers
+#   python cli.py work http://HOST:PORT        a worker, on this or any other machine
+#
+# Only light modules are imported up front; Selenium, openpyxl, pandas,
+# pyarrow and process pools load when a run actually needs them.
+# --------------------------
+import argparse
+import os
+import sys
+import time
+import metrics
+from browser_pool import DEFAULT_POOL_SIZE as BROWSER_POOL_SIZE
+from checkpoint import DEFAULT_JOURNAL_PATH, CheckpointJournal
+from db_sink import SqliteWriter, export_to_excel, seed_from_workbook, status_transitions
+from dealer_registry import (DEALER_FIELDS, DEFAULT_TTL, close_dealer_registry, enable_dealer_registry,
+                             get_dealer_registry)
+from delta import DEFAULT_DELTA_PATH, DEFAULT_REPORT_PATH, DeltaState
+from distributed import DEFAULT_LEASE_BATCH, run_worker, seed, start_local_workers, wait_until_drained
+from fetcher import DEFAULT_MAX_RATE, DEFAULT_WORKERS, AdaptiveRateLimit, fetch_ordered, set_rate_limiter
+from listings import DEFAULT_LISTING_MODE, LISTING_MODES, collect_dealer_listings
+from normalize import typed_headers
+from page_cache import close_page_cache, enable_page_cache
+from parse_health import DEFAULT_ABORT_RATE, DEFAULT_ABORT_WINDOW, CrawlAborted, ParseMonitor
+from scraper import get_dealers, scrape_dealer, scrape_vehicle
+from work_queue import (DEFAULT_BROKER_HOST, DEFAULT_BROKER_PORT, DEFAULT_QUEUE_PATH, DEFAULT_VISIBILITY, TOKEN_ENV,
+                        QueueBroker, WorkQueue, new_token, open_queue)
+from writers import DB_EXTENSIONS, HEADERS, TypedWriter, merge_to_xlsx, open_writer
+
+STREAM_FILE = "vehicle_data_stream.csv"
+EXCEL_FILE = "vehicle_data.xlsx"
+NORMALIZE_REPORT = "normalize_failures.csv"
+# Journal key for ads crawled on their own (ads scope)
+ADS_SCOPE = "ads"
+
+
+def _read_urls(urls, path):
+    # urls from the command line plus one per line from `path` ('#' starts a comment)
+    found = list(urls)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            found += [line.split("#", 1)[0].strip() for line in f]
+    return list(dict.fromkeys(u for u in found if u))
+
+
+# --------------------------
+# Arguments
+# --------------------------
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+
+    crawl = common.add_argument_group("concurrency")
+    crawl.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ad pages fetched at the same time")
+    crawl.add_argument("--processes", type=int, default=1, help="crawl dealers in this many worker processes")
+    crawl.add_argument("--rate", type=float,
+                       help=f"ceiling for the adaptive requests/second rate (default {DEFAULT_MAX_RATE:g})")
+    crawl.add_argument("--pipeline", action="store_true",
+                       help="fetch, parse and write ads in separate stages (parsing in worker processes)")
+    crawl.add_argument("--listing-mode", choices=LISTING_MODES, default=DEFAULT_LISTING_MODE,
+                       help="how dealer listings are expanded (browser modes need Selenium)")
+
+    sink = common.add_argument_group("output")
+    sink.add_argument("--output", default=STREAM_FILE,
+                      help="streaming output (.csv, .jsonl, .xlsx, .parquet or .sqlite), written as ads are scraped")
+    sink.add_argument("--excel", default=EXCEL_FILE, help="workbook the streamed rows are merged into at the end")
+    sink.add_argument("--no-merge", action="store_true", help="keep only the streaming output")
+    sink.add_argument("--raw-values", action="store_true", help="skip the typed price/mileage/engine/year columns")
+    sink.add_argument("--normalize-report", default=NORMALIZE_REPORT,
+                      help="values the typed columns could not be parsed from")
+    sink.add_argument("--dealers-out", metavar="PATH",
+                      help="write dealer details here once per dealer; ad rows then keep only the Dealer ID")
+    sink.add_argument("--metrics", help="write run metrics to this file (.prom for Prometheus text, else JSON lines)")
+
+    health = common.add_argument_group("parse health")
+    health.add_argument("--abort-empty-rate", type=float, default=DEFAULT_ABORT_RATE,
+                        help="stop when this share of recent ads lack a key field (0: never)")
+    health.add_argument("--abort-window", type=int, default=DEFAULT_ABORT_WINDOW,
+                        help="recent ads the empty-field rate is measured over")
+
+    cache = common.add_argument_group("cache and state")
+    cache.add_argument("--no-cache", action="store_true", help="don't use the page cache or the dealer registry")
+    cache.add_argument("--dealer-ttl", type=float, default=DEFAULT_TTL / 86400,
+                       help="days a dealer's cached details stay valid (default %(default)g)")
+    cache.add_argument("--resume", action="store_true", help="continue an interrupted crawl from its checkpoint")
+    cache.add_argument("--checkpoint", default=DEFAULT_JOURNAL_PATH, help="checkpoint journal file")
+    cache.add_argument("--delta", nargs="?", const=DEFAULT_DELTA_PATH, metavar="STATE",
+                       help=f"only scrape ads that are new or changed since the last delta run "
+                            f"(state in {DEFAULT_DELTA_PATH})")
+    cache.add_argument("--delta-report", default=DEFAULT_REPORT_PATH,
+                       help="added/removed/changed report of a delta run")
+
+    parser = argparse.ArgumentParser(description="Scrape vehicle ads from autostream.lk")
+    scopes = parser.add_subparsers(dest="scope", required=True)
+    scopes.add_parser("site", parents=[common], help="every dealer on the site")
+    dealers = scopes.add_parser("dealers", parents=[common], help="a list of dealer pages")
+    dealers.add_argument("urls", nargs="*", help="dealer page URLs")
+    dealers.add_argument("--file", help="file with one dealer URL per line")
+    dealer = scopes.add_parser("dealer", parents=[common], help="a single dealer")
+    dealer.add_argument("urls", nargs=1, metavar="url", help="dealer page URL")
+    dealer.add_argument("--dealer-row", action="store_true", help="also write a dealer-only row")
+    ads = scopes.add_parser("ads", parents=[common], help="individual ad pages")
+    ads.add_argument("urls", nargs="*", help="ad page URLs")
+    ads.add_argument("--file", help="file with one ad URL per line")
+
+    coordinate = scopes.add_parser("coordinate", parents=[common],
+                                   help="queue a crawl for workers, serve it to them, write the results")
+    coordinate.add_argument("urls", nargs="*", help="dealer page URLs (default: every dealer on the site)")
+    coordinate.add_argument("--file", help="file with one URL per line")
+    coordinate.add_argument("--ads", action="store_true", help="the URLs are ad pages, not dealer pages")
+    coordinate.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="queue database")
+    coordinate.add_argument("--host", default=DEFAULT_BROKER_HOST,
+                            help="broker address (0.0.0.0 to take workers from other machines)")
+    coordinate.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                            help=f"secret workers must send (default ${TOKEN_ENV}, else a random one)")
+    coordinate.add_argument("--port", type=int, default=DEFAULT_BROKER_PORT, help="broker port")
+    coordinate.add_argument("--no-broker", action="store_true", help="local workers only (they share the queue file)")
+    coordinate.add_argument("--local-workers", type=int, default=0, help="worker processes to start on this machine")
+
+    work = scopes.add_parser("work", help="lease and scrape queued URLs until the queue is drained")
+    work.add_argument("target", help="broker URL (http://host:port) or queue database path")
+    work.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                      help=f"the coordinator's broker token (default ${TOKEN_ENV})")
+    work.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ad pages fetched at the same time")
+    work.add_argument("--rate", type=float,
+                      help=f"ceiling for this worker's adaptive requests/second rate (default {DEFAULT_MAX_RATE:g})")
+    work.add_argument("--listing-mode", choices=LISTING_MODES, default=DEFAULT_LISTING_MODE)
+    work.add_argument("--batch", type=int, default=DEFAULT_LEASE_BATCH, help="tasks leased per request")
+    work.add_argument("--visibility", type=float, default=DEFAULT_VISIBILITY,
+                      help="seconds before a leased task is handed to another worker")
+    work.add_argument("--no-cache", action="store_true", help="don't use the page cache or the dealer registry")
+    work.add_argument("--dealer-ttl", type=float, default=DEFAULT_TTL / 86400)
+    work.add_argument("--abort-empty-rate", type=float, default=DEFAULT_ABORT_RATE,
+                      help="stop when this share of recent ads lack a key field (0: never)")
+    work.add_argument("--abort-window", type=int, default=DEFAULT_ABORT_WINDOW)
+    work.add_argument("--metrics", help="write this worker's metrics to this file")
+    return parser
+
+
+# --------------------------
+# Crawling
+# --------------------------
+def _crawl_dealers(args, dealers, on_ad, journal, delta, dealer_ttl):
+    pending = [d for d in dealers if d not in journal.done_dealers]
+    use_cache = not args.no_cache
+    if args.processes > 1:
+        from parallel import DEFAULT_RATE, crawl_dealers_parallel
+
+        # Dealers sharded over worker processes; records come back here in dealer order
+        crawl_dealers_parallel(
+            pending, on_ad, journal.dealer_done, processes=args.processes,
+            rate=args.rate or DEFAULT_RATE, ad_workers=args.workers, listing_mode=args.listing_mode,
+            skip_ads=journal.done_ads, use_cache=use_cache, pipeline=args.pipeline, delta=delta,
+            dealer_ttl=dealer_ttl, include_dealer_row=getattr(args, "dealer_row", False),
+        )
+        return
+
+    # Expand the next dealer pages in parallel (one per pooled browser)
+    # while the current dealer's ads are being scraped
+    expanded = fetch_ordered(pending, lambda u: collect_dealer_listings(u, args.listing_mode), BROWSER_POOL_SIZE)
+    for dealer_url, listing, error in expanded:
+        if error:
+            print(f"❌ Failed to scrape dealer {dealer_url}: {error}")
+            metrics.record_error("dealer", error)
+            continue
+        try:
+            scrape_dealer(
+                dealer_url, workers=args.workers, listing=listing, skip_ads=journal.done_ads,
+                include_dealer_row=getattr(args, "dealer_row", False),
+                on_ad=lambda record: on_ad(dealer_url, record), pipeline=args.pipeline, delta=delta,
+            )
+            journal.dealer_done(dealer_url)
+        except CrawlAborted:
+            raise
+        except Exception as e:
+            print(f"❌ Failed to scrape dealer {dealer_url}: {e}")
+            metrics.record_error("dealer", e)
+
+
+def _crawl_ads(args, ad_urls, on_ad, journal):
+    pending = [u for u in ad_urls if u not in journal.done_ads]
+    scraped = 0
+    for ad_url, record, error in fetch_ordered(pending, lambda u: scrape_vehicle(u, {}), args.workers):
+        if error:
+            print(f"❌ Failed to scrape {ad_url}: {error}")
+            metrics.record_error("ad", error)
+            continue
+        on_ad(ADS_SCOPE, record)
+        scraped += 1
+    metrics.count("ads_scraped", scraped)
+
+
+# --------------------------
+# Shared run steps
+# --------------------------
+def _enable_caches(args):
+    # -> dealer registry ttl for worker processes (None: no registry)
+    # --dealers-out needs the registry even without caching (ttl 0: always re-resolved)
+    dealer_ttl = 0 if args.no_cache else args.dealer_ttl * 86400
+    if not args.no_cache:
+        enable_page_cache()
+    if not args.no_cache or getattr(args, "dealers_out", None):
+        enable_dealer_registry(ttl=dealer_ttl)
+        return dealer_ttl
+    return None
+
+
+def _open_output(args, append=False):
+    # with --dealers-out the dealer columns live in their own file, keyed by Dealer ID
+    headers = [h for h in HEADERS if h not in DEALER_FIELDS] if args.dealers_out else HEADERS
+    if not args.raw_values:
+        # numbers parsed from the raw strings in batches, written as typed columns
+        headers = typed_headers(headers)
+    if os.path.splitext(args.output)[1].lower() in DB_EXTENSIONS and not args.no_merge:
+        # the workbook is rewritten from the database at the end: start it from the workbook
+        seeded = seed_from_workbook(args.output, args.excel, headers)
+        if seeded:
+            print(f"🗄️ Seeded {args.output} with {seeded} rows from {args.excel}.")
+    writer = open_writer(args.output, headers, append=append)
+    return (writer if args.raw_values else TypedWriter(writer)), headers
+
+
+def _finish_output(args, writer, headers, started, aborted=False):
+    if aborted:
+        print(f"⚠️ Partial output: the crawl stopped early, {writer.rows_written} ads written to {args.output}.")
+    else:
+        print(f"✅ Scraping complete! {writer.rows_written} ads written to {args.output}.")
+    if isinstance(getattr(writer, "inner", writer), SqliteWriter):
+        # the database is the source of truth: rewrite the workbook from it, no duplicates
+        if not args.no_merge:
+            with metrics.timed("save_merge"):
+                rows = export_to_excel(args.output, args.excel, headers)
+            print(f"📗 Exported {rows} rows to {args.excel}.")
+        print(f"🔁 {len(status_transitions(args.output, since=started))} ads went Available -> Sold this run.")
+    elif not args.no_merge:
+        with metrics.timed("save_merge"):
+            rows = merge_to_xlsx([args.output], args.excel, headers)
+        if args.output == STREAM_FILE:
+            # only the default intermediate file goes; an --output the user named is kept
+            os.remove(args.output)
+        print(f"📗 Merged into {args.excel} ({rows} rows).")
+    if getattr(writer, "failures", None):
+        with open_writer(args.normalize_report, ["Ad URL", "Column", "Raw Value"]) as report:
+            for ad_url, column, raw in writer.failures:
+                report.write({"Ad URL": ad_url, "Column": column, "Raw Value": raw})
+        print(f"⚠️ {len(writer.failures)} values could not be typed, see {args.normalize_report}.")
+
+
+def _finish_metrics(args):
+    metrics.print_summary()
+    if args.metrics:
+        metrics.write_metrics(args.metrics)
+
+
+# --------------------------
+# Work-queue mode: a coordinator and stateless workers (any number of machines)
+# --------------------------
+def _worker_args(args) -> list:
+    # flags local worker processes inherit from the coordinator
+    out = ["--workers", str(args.workers), "--listing-mode", args.listing_mode, "--dealer-ttl", str(args.dealer_ttl),
+           "--abort-empty-rate", str(args.abort_empty_rate), "--abort-window", str(args.abort_window)]
+    if args.rate:
+        out += ["--rate", str(args.rate)]
+    if args.no_cache:
+        out.append("--no-cache")
+    return out
+
+
+def _run_coordinate(args, urls) -> int:
+    started = time.time()
+    if not args.resume:
+        # a new crawl starts from an empty queue; --resume continues the old one
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.queue + suffix):
+                os.remove(args.queue + suffix)
+    queue = WorkQueue(args.queue)
+    if args.ads:
+        added = seed(queue, ads=urls)
+    else:
+        dealers = urls or get_dealers()
+        print(f"🌐 Found {len(dealers)} dealers")
+        added = seed(queue, dealers=dealers)
+    print(f"📬 {added} tasks queued in {args.queue}")
+
+    broker = None
+    if not args.no_broker:
+        token = args.token or new_token()
+        broker = QueueBroker(queue, token, args.host, args.port).start()
+        print(f"📡 Broker listening on {args.host}:{broker.port}: "
+              f"{TOKEN_ENV}=<token> python cli.py work http://<this host>:{broker.port}")
+        if not args.token:
+            print(f"🔑 Broker token: {token}")
+    processes = start_local_workers(args.local_workers, args.queue, _worker_args(args))
+    try:
+        stats = wait_until_drained(queue, processes)
+    finally:
+        if broker:
+            broker.stop()
+    # workers that aborted (pages stopped parsing) leave tasks behind
+    unfinished = stats["ready"] + stats["leased"]
+    if unfinished:
+        print(f"📬 Queue stopped: {stats['done']} done, {stats['failed']} failed, {unfinished} unfinished")
+    else:
+        print(f"📬 Queue drained: {stats['done']} done, {stats['failed']} failed")
+    for kind, url, error in queue.failures():
+        print(f"❌ Gave up on {kind} {url}: {error}")
+
+    writer, headers = _open_output(args)
+    try:
+        for record in queue.iter_results():
+            writer.write(record)
+    finally:
+        writer.close()
+    queue.close()
+    _finish_output(args, writer, headers, started, aborted=bool(unfinished))
+    _finish_metrics(args)
+    return 2 if unfinished else 0
+
+
+def _run_work(args) -> int:
+    if args.rate:
+        set_rate_limiter(AdaptiveRateLimit(max_rate=args.rate))
+    _enable_caches(args)
+    queue = open_queue(args.target, args.token)
+    try:
+        run_worker(queue, workers=args.workers, listing_mode=args.listing_mode, batch=args.batch,
+                   visibility=args.visibility, monitor=ParseMonitor(args.abort_empty_rate, args.abort_window))
+    finally:
+        queue.close()
+        close_page_cache()
+        close_dealer_registry()
+    _finish_metrics(args)
+    return 0
+
+
+# --------------------------
+# Run
+# --------------------------
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.scope == "work":
+        return _run_work(args)
+    if os.path.abspath(args.output) == os.path.abspath(args.excel):
+        # the stream would overwrite the workbook that holds earlier runs
+        parser.error("--output and --excel must be different files")
+    urls = _read_urls(args.urls, getattr(args, "file", None)) if args.scope != "site" else []
+    if args.scope == "coordinate":
+        if args.delta or args.dealers_out or args.processes > 1:
+            parser.error("coordinate: --delta, --dealers-out and --processes are not supported in work-queue mode")
+        if args.no_broker and args.local_workers < 1:
+            # no broker and no local workers: nothing could ever drain the queue
+            parser.error("coordinate: --no-broker needs --local-workers 1 or more")
+        return _run_coordinate(args, urls)
+    if args.scope != "site" and not urls:
+        parser.error(f"{args.scope}: no URLs given")
+    if args.scope == "ads" and (args.delta or args.processes > 1):
+        parser.error("ads: --delta and --processes work per dealer; use a dealer scope")
+    if args.rate:
+        set_rate_limiter(AdaptiveRateLimit(max_rate=args.rate))
+
+    started = time.time()
+    writer, headers = _open_output(args, append=args.resume)
+    journal = CheckpointJournal(args.checkpoint, resume=args.resume, before_flush=writer.flush)
+    delta = DeltaState(args.delta) if args.delta else None
+    dealer_ttl = _enable_caches(args)
+    monitor = ParseMonitor(args.abort_empty_rate, args.abort_window)
+
+    def on_ad(dealer_url, record):
+        with metrics.timed("save"):
+            writer.write(record)
+        journal.ad_done(dealer_url, record["Ad URL"])
+        if record["Ad URL"] != dealer_url:
+            # not the dealer-only row, which has no vehicle fields
+            monitor.check(record)
+
+    dealers = []
+    aborted = False
+    try:
+        if args.scope == "ads":
+            _crawl_ads(args, urls, on_ad, journal)
+        else:
+            dealers = get_dealers() if args.scope == "site" else urls
+            print(f"🌐 Found {len(dealers)} dealers")
+            _crawl_dealers(args, dealers, on_ad, journal, delta, dealer_ttl)
+    except CrawlAborted as e:
+        # what was scraped so far is still written out; --resume continues after a fix
+        print(f"🛑 Crawl aborted: {e}")
+        aborted = True
+    finally:
+        if args.pipeline:
+            from pipeline import shutdown_parse_pools
+            shutdown_parse_pools()
+        journal.close()
+        writer.close()
+
+    _finish_output(args, writer, headers, started, aborted)
+    if delta:
+        if args.scope == "site":
+            # only a full dealer list can tell which dealers disappeared
+            delta.forget_dealers(dealers)
+        changes = delta.write_report(args.delta_report)
+        summary = delta.summary()
+        print(f"🔁 Delta: {summary['added']} added, {summary['changed']} changed, {summary['removed']} removed "
+              f"({changes} rows in {args.delta_report}).")
+        delta.close()
+    if args.dealers_out and dealers:
+        rows = get_dealer_registry().write(args.dealers_out, dealers)
+        print(f"🏪 {rows} dealers written to {args.dealers_out}.")
+    if not aborted:
+        journal.finish()
+    close_page_cache()
+    close_dealer_registry()
+    _finish_metrics(args)
+    return 2 if aborted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import json
+import os
+import sqlite3
+import time
+from normalize import NUMERIC_TYPES
+from writers import RecordWriter, XlsxStreamWriter
+
+BATCH_SIZE = 500
+KEY = "Ad URL"
+INDEXED = ("Dealer Name", "Status", "Year of Manufacture")
+
+
+def _q(name: str) -> str:
+    # quote a header as an SQLite identifier ("Engine CC / kw", "No. of Owners", ...)
+    return '"' + name.replace('"', '""') + '"'
+
+
+# --------------------------
+# SQLite sink: one row per Ad URL, upserted in batched transactions
+# --------------------------
+class SqliteWriter(RecordWriter):
+    def __init__(self, path, headers, append=True):
+        # a database is always continued; re-scraped ads are updated in place
+        super().__init__(path, headers, append)
+        if KEY not in self.headers:
+            self.headers.append(KEY)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        ensure_schema(self._conn, self.headers)
+        self._batch = {}
+
+    def write(self, record):
+        self._batch[record[KEY]] = record
+        self.rows_written += 1
+        if len(self._batch) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        records, self._batch = list(self._batch.values()), {}
+        now = time.time()
+        columns = [h for h in self.headers if h != KEY]
+        with self._conn:
+            # remember Available -> Sold (and any other) status transitions
+            urls = [r[KEY] for r in records]
+            previous = {}
+            for i in range(0, len(urls), 900):
+                chunk = urls[i:i + 900]
+                previous.update(self._conn.execute(
+                    f"SELECT {_q(KEY)}, Status FROM ads WHERE {_q(KEY)} IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+            self._conn.executemany(
+                "INSERT INTO status_changes (ad_url, old_status, new_status, changed_at) VALUES (?, ?, ?, ?)",
+                [(r[KEY], previous[r[KEY]], r.get("Status", ""), now)
+                 for r in records
+                 if r[KEY] in previous and previous[r[KEY]] != r.get("Status", "")],
+            )
+
+            names = [KEY] + columns + ["extra", "first_seen", "last_seen"]
+            updates = ", ".join(f"{_q(c)} = excluded.{_q(c)}" for c in columns + ["extra", "last_seen"])
+            self._conn.executemany(
+                f"INSERT INTO ads ({', '.join(_q(n) for n in names)}) "
+                f"VALUES ({', '.join('?' * len(names))}) "
+                f"ON CONFLICT ({_q(KEY)}) DO UPDATE SET {updates}",
+                [
+                    [r[KEY]] + [r.get(c, "") for c in columns]
+                    + [json.dumps({k: v for k, v in r.items() if k not in self.headers}, ensure_ascii=False),
+                       now, now]
+                    for r in records
+                ],
+            )
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+def ensure_schema(conn, headers):
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS ads ({_q(KEY)} TEXT PRIMARY KEY, "
+        "extra TEXT, first_seen REAL, last_seen REAL)"
+    )
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(ads)")}
+    for h in headers:
+        if h not in existing:
+            affinity = {int: "INTEGER", float: "REAL"}.get(NUMERIC_TYPES.get(h), "TEXT")
+            conn.execute(f"ALTER TABLE ads ADD COLUMN {_q(h)} {affinity}")
+    for h in INDEXED:
+        if h in headers or h in existing:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {_q('ads_' + h)} ON ads ({_q(h)})")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS status_changes ("
+        " ad_url TEXT, old_status TEXT, new_status TEXT, changed_at REAL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS status_changes_new ON status_changes (new_status, changed_at)")
+    conn.commit()
+
+
+# --------------------------
+# Reading back
+# --------------------------
+def iter_db_rows(path, headers):
+    conn = sqlite3.connect(path)
+    try:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(ads)")}
+        select = ", ".join(_q(h) if h in existing else "''" for h in headers)
+        for values in conn.execute(f"SELECT {select} FROM ads ORDER BY rowid"):
+            yield ["" if v is None else v for v in values]
+    finally:
+        conn.close()
+
+
+def seed_from_workbook(path, file_name, headers) -> int:
+    # a new database starts with the rows of the workbook it will later be
+    # exported over, so the first export keeps earlier runs
+    if not os.path.exists(file_name):
+        return 0
+    conn = sqlite3.connect(path)
+    try:
+        ensure_schema(conn, headers)
+        if conn.execute("SELECT COUNT(*) FROM ads").fetchone()[0]:
+            return 0
+    finally:
+        conn.close()
+    from writers import iter_rows
+
+    with SqliteWriter(path, headers) as db:
+        for values in iter_rows(file_name, headers):
+            record = dict(zip(headers, values))
+            if record.get(KEY):
+                db.write(record)
+    return db.rows_written
+
+
+def export_to_excel(path, file_name, headers):
+    # rewrite file_name from the database in the save_to_excel header layout
+    with XlsxStreamWriter(file_name, headers) as out:
+        for values in iter_db_rows(path, headers):
+            out.write_values(values)
+    return out.rows_written
+
+
+def status_transitions(path, old_status="Available", new_status="Sold", since=0.0):
+    # [(ad url, changed_at)] for ads that went old_status -> new_status
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT ad_url, changed_at FROM status_changes"
+            " WHERE old_status = ? AND new_status = ? AND changed_at >= ? ORDER BY changed_at",
+            (old_status, new_status, since),
+        ).fetchall()
+    finally:
+        conn.close()
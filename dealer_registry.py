@@ -0,0 +1,121 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+import metrics
+from extraction import extract_dealer_info_from_dealer_page
+from writers import open_writer
+
+DEFAULT_REGISTRY_PATH = ".dealer_cache.sqlite"
+DEFAULT_TTL = 7 * 24 * 3600  # seconds before a dealer's info is extracted again
+
+# Dealer columns every ad row used to carry as full strings
+DEALER_FIELDS = ["Dealer Name", "Dealership Location", "Sales Hours", "Seller Email", "Dealer Contact Number"]
+DEALER_HEADERS = ["Dealer ID", "Dealer URL", *DEALER_FIELDS]
+
+
+def dealer_id(dealer_url: str) -> str:
+    # the dealer page slug (/author/<slug>/), else a short hash of the url
+    slug = urlsplit(dealer_url).path.rstrip("/").rsplit("/", 1)[-1]
+    return slug or hashlib.sha1(dealer_url.encode("utf-8")).hexdigest()[:12]
+
+
+def learn_missing(dealer_info: dict, record: dict):
+    # copy dealer fields an ad page filled in, so later ads skip that enrichment
+    for field in DEALER_FIELDS:
+        if not dealer_info.get(field) and record.get(field):
+            dealer_info[field] = record[field]
+
+
+# --------------------------
+# Dealer info resolved once per dealer, kept on disk for `ttl` seconds
+# --------------------------
+class DealerRegistry:
+    def __init__(self, path=DEFAULT_REGISTRY_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dealers ("
+            " dealer_id TEXT PRIMARY KEY, dealer_url TEXT, info TEXT, resolved_at REAL)"
+        )
+        self._conn.commit()
+
+    def lookup(self, dealer_url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT info FROM dealers WHERE dealer_id = ? AND resolved_at >= ?",
+                (dealer_id(dealer_url), time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def resolve(self, dealer_url, soup) -> dict:
+        # cached info while fresh, otherwise extract it from the dealer page soup
+        info = self.lookup(dealer_url)
+        if info is not None:
+            metrics.count("dealer_registry", result="hit")
+            return info
+        info = {"Dealer ID": dealer_id(dealer_url), **extract_dealer_info_from_dealer_page(soup)}
+        metrics.count("dealer_registry", result="resolved")
+        self.store(dealer_url, info)
+        return info
+
+    def store(self, dealer_url, info: dict, resolved_at=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dealers VALUES (?, ?, ?, ?)",
+                (dealer_id(dealer_url), dealer_url, json.dumps(info, ensure_ascii=False),
+                 resolved_at or time.time()),
+            )
+            self._conn.commit()
+
+    def update(self, dealer_url, info: dict):
+        # fields learned from ad pages; keeps the original resolve time
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT info, resolved_at FROM dealers WHERE dealer_id = ?", (dealer_id(dealer_url),)
+            ).fetchone()
+        if row and json.loads(row[0]) != info:
+            self.store(dealer_url, info, resolved_at=row[1])
+
+    def write(self, path, dealer_urls) -> int:
+        # one row per dealer, for outputs whose ad rows carry only the Dealer ID
+        ids = {dealer_id(u) for u in dealer_urls}
+        with self._lock:
+            rows = self._conn.execute("SELECT dealer_id, dealer_url, info FROM dealers ORDER BY dealer_id").fetchall()
+        written = 0
+        with open_writer(path, DEALER_HEADERS) as writer:
+            for row_id, dealer_url, info in rows:
+                if row_id in ids:
+                    writer.write({**json.loads(info), "Dealer ID": row_id, "Dealer URL": dealer_url})
+                    written += 1
+        return written
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_registry = None
+
+
+def enable_dealer_registry(path=DEFAULT_REGISTRY_PATH, **kwargs) -> DealerRegistry:
+    global _registry
+    if _registry is None:
+        _registry = DealerRegistry(path, **kwargs)
+    return _registry
+
+
+def get_dealer_registry():
+    return _registry
+
+
+def close_dealer_registry():
+    global _registry
+    if _registry is not None:
+        _registry.close()
+        _registry = None
@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+import time
+from writers import open_writer
+
+DEFAULT_DELTA_PATH = "delta_state.sqlite"
+DEFAULT_REPORT_PATH = "delta_report.csv"
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+REPORT_HEADERS = ["Change", "Dealer URL", "Ad URL", "Run"]
+
+
+# --------------------------
+# Ad link sets + listing card fingerprints from earlier runs
+# (delta runs fully scrape only new or changed ads)
+# --------------------------
+class DeltaState:
+    def __init__(self, path=DEFAULT_DELTA_PATH, run_id=None):
+        self.path = path
+        # every process of one crawl shares the run id, so the report covers all of them
+        self.run_id = run_id or time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ads ("
+            " ad_url TEXT PRIMARY KEY, dealer_url TEXT, fingerprint TEXT, last_seen REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ads_dealer ON ads (dealer_url)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            " run_id TEXT, change TEXT, dealer_url TEXT, ad_url TEXT, at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS changes_run ON changes (run_id)")
+        self._conn.commit()
+
+    def compare(self, dealer_url, fingerprints: dict) -> dict:
+        # ad url -> ADDED / CHANGED / REMOVED; unchanged ads are left out
+        with self._lock:
+            previous = dict(self._conn.execute(
+                "SELECT ad_url, fingerprint FROM ads WHERE dealer_url = ?", (dealer_url,)
+            ))
+        changes = {}
+        for ad_url, fingerprint in fingerprints.items():
+            if ad_url not in previous:
+                changes[ad_url] = ADDED
+            elif previous[ad_url] != fingerprint:
+                changes[ad_url] = CHANGED
+        for ad_url in previous.keys() - fingerprints.keys():
+            changes[ad_url] = REMOVED
+        return changes
+
+    def update(self, dealer_url, fingerprints: dict, changes: dict, failed=()):
+        # store the new state once the dealer's ads are scraped; failed ads are
+        # not stored, so the next run picks them up again
+        now = time.time()
+        stored, logged = [], []
+        for ad_url, change in changes.items():
+            if ad_url in failed:
+                continue
+            logged.append((self.run_id, change, dealer_url, ad_url, now))
+            if change != REMOVED:
+                stored.append((ad_url, dealer_url, fingerprints[ad_url], now))
+        removed = [(u,) for u, change in changes.items() if change == REMOVED]
+        with self._lock:
+            self._conn.executemany("DELETE FROM ads WHERE ad_url = ?", removed)
+            self._conn.executemany(
+                "INSERT INTO ads (ad_url, dealer_url, fingerprint, last_seen) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(ad_url) DO UPDATE SET dealer_url = excluded.dealer_url,"
+                " fingerprint = excluded.fingerprint, last_seen = excluded.last_seen",
+                stored,
+            )
+            self._conn.executemany("INSERT INTO changes VALUES (?, ?, ?, ?, ?)", logged)
+            self._conn.commit()
+
+    def forget_dealers(self, keep_dealers):
+        # dealers gone from the dealer list: all their ads count as removed
+        keep = set(keep_dealers)
+        with self._lock:
+            rows = [r for r in self._conn.execute("SELECT ad_url, dealer_url FROM ads") if r[1] not in keep]
+        by_dealer = {}
+        for ad_url, dealer_url in rows:
+            by_dealer.setdefault(dealer_url, {})[ad_url] = REMOVED
+        for dealer_url, changes in by_dealer.items():
+            self.update(dealer_url, {}, changes)
+
+    def summary(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT change, COUNT(*) FROM changes WHERE run_id = ? GROUP BY change", (self.run_id,)
+            ).fetchall()
+        return {ADDED: 0, CHANGED: 0, REMOVED: 0, **dict(rows)}
+
+    def write_report(self, path=DEFAULT_REPORT_PATH) -> int:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT change, dealer_url, ad_url FROM changes WHERE run_id = ? ORDER BY rowid", (self.run_id,)
+            ).fetchall()
+        with open_writer(path, REPORT_HEADERS) as writer:
+            for change, dealer_url, ad_url in rows:
+                writer.write({"Change": change, "Dealer URL": dealer_url, "Ad URL": ad_url, "Run": self.run_id})
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
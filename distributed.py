@@ -0,0 +1,127 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import metrics
+from fetcher import DEFAULT_WORKERS, fetch_ordered
+from listings import DEFAULT_LISTING_MODE
+from parse_health import CrawlAborted
+from scraper import resolve_dealer, scrape_vehicle
+from work_queue import AD, DEALER, DEFAULT_VISIBILITY
+
+# Tasks leased per round trip; a batch of ads is fetched `workers` at a time
+DEFAULT_LEASE_BATCH = 16
+# Seconds an idle worker waits before asking again (others may still add ads)
+POLL_INTERVAL = 2.0
+# Seconds between coordinator progress lines
+REPORT_INTERVAL = 10.0
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# --------------------------
+# Worker: lease, fetch + parse, store results, ack (stateless, any machine)
+# --------------------------
+def _process_dealer(queue, task, listing_mode):
+    # a dealer task turns into one ad task per listing, carrying the dealer info
+    dealer_info, ad_urls, _ = resolve_dealer(task["url"], listing_mode)
+    queue.enqueue([
+        {"kind": AD, "url": url, "payload": {"dealer_info": dealer_info},
+         "dealer_seq": task["dealer_seq"], "seq": seq}
+        for seq, url in enumerate(ad_urls)
+    ])
+    metrics.count("dealers_scraped")
+
+
+def _process_ads(queue, tasks, workers, name, monitor=None):
+    by_url = {task["url"]: task for task in tasks}
+    results, acked = [], []
+    scrape = lambda url: scrape_vehicle(url, by_url[url]["payload"].get("dealer_info", {}))  # noqa: E731
+    for ad_url, record, error in fetch_ordered(list(by_url), scrape, workers):
+        task = by_url[ad_url]
+        if error:
+            print(f"❌ Failed to scrape {ad_url}: {error}")
+            metrics.record_error("ad", error)
+            queue.fail([task["token"]], error)
+            continue
+        results.append({"record": record, "dealer_seq": task["dealer_seq"], "seq": task["seq"]})
+        acked.append(task["token"])
+    # results first: an acked task always has its row
+    if results:
+        queue.put_results(results, name)
+        queue.ack(acked)
+    metrics.count("ads_scraped", len(results))
+    if monitor:
+        for result in results:
+            monitor.check(result["record"])
+    return len(results)
+
+
+def run_worker(queue, workers=DEFAULT_WORKERS, listing_mode=DEFAULT_LISTING_MODE,
+               batch=DEFAULT_LEASE_BATCH, visibility=DEFAULT_VISIBILITY, monitor=None):
+    # runs until the queue has nothing ready or leased (or the monitor
+    # aborts: pages stopped parsing); returns ads scraped
+    name = worker_name()
+    scraped = 0
+    print(f"👷 Worker {name} started")
+    while True:
+        tasks, drained = queue.lease(name, batch, visibility)
+        if not tasks:
+            if drained:
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+        for task in (t for t in tasks if t["kind"] == DEALER):
+            try:
+                _process_dealer(queue, task, listing_mode)
+                queue.ack([task["token"]])
+            except Exception as e:
+                print(f"❌ Failed to scrape dealer {task['url']}: {e}")
+                metrics.record_error("dealer", e)
+                queue.fail([task["token"]], e)
+        ad_tasks = [t for t in tasks if t["kind"] == AD]
+        if ad_tasks:
+            try:
+                scraped += _process_ads(queue, ad_tasks, workers, name, monitor)
+            except CrawlAborted as e:
+                print(f"🛑 Worker {name} aborted: {e}")
+                break
+    print(f"👷 Worker {name} done: {scraped} ads")
+    return scraped
+
+
+# --------------------------
+# Coordinator: seed the queue, optionally start local workers, wait for it to drain
+# --------------------------
+def seed(queue, dealers=(), ads=()) -> int:
+    tasks = [{"kind": DEALER, "url": url, "dealer_seq": i} for i, url in enumerate(dealers)]
+    tasks += [{"kind": AD, "url": url, "dealer_seq": len(dealers), "seq": i} for i, url in enumerate(ads)]
+    return queue.enqueue(tasks)
+
+
+def start_local_workers(count, target, worker_args=()):
+    # `python cli.py work <target>` subprocesses on this machine
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+    return [subprocess.Popen([sys.executable, cli, "work", target, *worker_args]) for _ in range(count)]
+
+
+def wait_until_drained(queue, processes=()):
+    last_report = 0.0
+    while True:
+        stats = queue.stats()
+        if stats["ready"] == 0 and stats["leased"] == 0:
+            break
+        if all(p.poll() is not None for p in processes) and processes:
+            print("⚠️ All local workers exited with work left in the queue")
+            break
+        if time.monotonic() - last_report >= REPORT_INTERVAL:
+            print(f"📬 Queue: {stats['ready']} ready, {stats['leased']} leased, {stats['done']} done, "
+                  f"{stats['failed']} failed, {stats['results']} results")
+            last_report = time.monotonic()
+        time.sleep(1.0)
+    for p in processes:
+        p.wait()
+    return queue.stats()
@@ -0,0 +1,339 @@
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+import soupsieve as sv
+import metrics
+
+
+# --------------------------
+# Value extractors
+# --------------------------
+def text(el) -> str:
+    return el.get_text(strip=True)
+
+
+def text_or_href(scheme_prefix: str):
+    # link text, or the part after "mailto:" / "tel:" when the link has no text
+    def extract(el) -> str:
+        txt = el.get_text(strip=True)
+        if txt:
+            return txt
+        href = el.get("href", "")
+        if href and href.startswith(scheme_prefix):
+            return href.split(":", 1)[1]
+        return ""
+    return extract
+
+
+def sold_or_available(value: str) -> str:
+    return "Sold" if "sold" in value.lower() else "Available"
+
+
+# --------------------------
+# Schema building blocks
+# --------------------------
+@dataclass(frozen=True)
+class Field:
+    # One output key. Each (scope, selector) step is tried in order and the
+    # first non-empty value wins; scope is a block selector searched first.
+    name: str
+    steps: tuple
+    extract: object = text
+    fallback: object = None     # fallback(soup) -> str when every step is empty
+    normalize: object = None
+    optional: bool = False      # leave the key out when nothing matched
+
+
+@dataclass(frozen=True)
+class Pairs:
+    # Repeated label/value items; labels are mapped through normalize_field_name
+    items: str
+    label: str
+    value: str
+    value_from_item: bool = False   # no value element: item text minus the label
+    require_value: bool = False
+
+
+@dataclass(frozen=True)
+class Groups:
+    # Repeated titled lists, joined into one string per title
+    items: str
+    title: str
+    entries: str
+    skip_empty: bool = True
+    separator: str = ", "
+
+
+@dataclass(frozen=True)
+class Fill:
+    # Fill keys that are still empty from one block of the page
+    block: str
+    fields: tuple
+
+
+# --------------------------
+# Label normalization (compiled once, memoized per label)
+# --------------------------
+_LABEL_SEPARATORS = re.compile(r'[\s\-\:_()]+')
+_LABEL_KW = re.compile(r'k w')
+_LABEL_CC_KW = re.compile(r'cc ?/ ?kw')
+
+LABEL_MAPPING = {
+    # Fuel
+    'fuel type': 'Fuel Type',
+    'fuel': 'Fuel Type',
+    # Engine CC / kW variants
+    'engine cc/kw': 'Engine CC / kw',
+    'engine cc kw': 'Engine CC / kw',
+    'engine cckw': 'Engine CC / kw',
+    'engine cc': 'Engine CC / kw',
+    'engine capacity': 'Engine CC / kw',
+    'engine capacity cc': 'Engine CC / kw',
+    'engine': 'Engine CC / kw',
+}
+
+
+@lru_cache(maxsize=512)
+def normalize_field_name(label: str) -> str | None:
+    key = _LABEL_SEPARATORS.sub(' ', label.lower()).strip()
+    key = _LABEL_KW.sub('kw', key)
+    key = _LABEL_CC_KW.sub('cc/kw', key)
+    return LABEL_MAPPING.get(key)
+
+
+# --------------------------
+# Heuristic fallbacks for dealer pages
+# --------------------------
+_LOCATION_LABEL = re.compile(r"location", re.I)
+_HOURS_LABEL = re.compile(r"(sales|working)\s*hours", re.I)
+_PHONE_NUMBER = re.compile(r"\+?\d[\d\s\-\(\)]{7,}")
+
+
+def _location_from_label(soup) -> str:
+    label = soup.find(string=_LOCATION_LABEL)
+    if label and label.parent:
+        return label.parent.get_text(" ", strip=True).replace("Location", "").strip()
+    return ""
+
+
+def _hours_from_label(soup) -> str:
+    label = soup.find(string=_HOURS_LABEL)
+    if label and label.parent:
+        return label.parent.get_text(" ", strip=True)
+    return ""
+
+
+def _phone_from_text(soup) -> str:
+    m = _PHONE_NUMBER.search(soup.get_text(" ", strip=True))
+    return m.group(0).strip() if m else ""
+
+
+# --------------------------
+# THE SCHEMA
+# --------------------------
+DEALER_BLOCK = (
+    ".stm-dealer-info, .dealer-info, .stm-dealer-box, .stm-dealer-details, "
+    ".author-info, .stm-seller-info, .seller-info, .dealer-contact"
+)
+
+DEALER_PAGE_SCHEMA = (
+    Field("Dealer Name", (
+        (DEALER_BLOCK, "h1, h2, h3, h4, .dealer-title, .dealer-name, .name, .title"),
+        (None, "h1, .page-title, .entry-title, .author-title"),
+    )),
+    Field("Dealership Location", (
+        (DEALER_BLOCK, ".stm-dealer-location, .dealer-location, .location, .dealer-address, address"),
+    ), fallback=_location_from_label),
+    Field("Sales Hours", (
+        (DEALER_BLOCK, ".dealer-working-hours, .working-hours, .hours, .dealer-hours"),
+    ), fallback=_hours_from_label),
+    Field("Seller Email", ((None, "a[href^='mailto:']"),), extract=text_or_href("mailto:")),
+    Field("Dealer Contact Number", ((None, "a[href^='tel:']"),), extract=text_or_href("tel:"),
+          fallback=_phone_from_text),
+)
+
+AD_PAGE_SCHEMA = (
+    Field("Vehicle Name", ((None, "h1.listing-title, h6.title.stm_listing_title"),)),
+    Field("Vehicle Price", ((None, ".price .heading-font, span.h3"),)),
+    Field("Status", ((None, "div.special-label.h5"),), normalize=sold_or_available),
+    # Main attributes (Body, Mileage, Fuel Type, Engine CC)
+    Pairs(".single-listing-attribute-boxes .item", ".label-text", ".value-text", value_from_item=True),
+    # Additional attributes
+    Pairs(".stm-single-car-listing-data .data-list-item", ".item-label", ".heading-font", require_value=True),
+    # Features
+    Groups(".stm-single-listing-car-features .grouped_checkbox-3", "h4", "ul li span"),
+    Field("Seller Notes", ((None, "section:has(h2:-soup-contains('Seller Notes'))"),), optional=True),
+    # Dealer fields the dealer page didn't provide
+    Fill(".dealer-info, .stm-dealer-box, .stm-dealer-info, .stm-seller-info", (
+        Field("Dealer Name", ((None, "h3, .dealer-title, .name, h4"),)),
+        Field("Dealership Location", ((None, ".stm-dealer-location, .dealer-location, .location"),)),
+        Field("Sales Hours", ((None, ".dealer-working-hours, .working-hours"),)),
+        Field("Seller Email", ((None, "a[href^='mailto:']"),), extract=text_or_href("mailto:")),
+        Field("Dealer Contact Number", ((None, "a[href^='tel:']"),), extract=text_or_href("tel:")),
+    )),
+)
+
+DEALER_LIST_ROW = "tr.stm-single-dealer"
+DEALER_LIST_LINK = ".dealer-info .h4"
+
+
+# --------------------------
+# Compile once: CSS -> prepared soupsieve selectors
+# --------------------------
+_compiled = {}
+
+
+def compiled(selector: str):
+    pattern = _compiled.get(selector)
+    if pattern is None:
+        pattern = _compiled[selector] = sv.compile(selector)
+    return pattern
+
+
+def compile_schema(schema):
+    for rule in schema:
+        if isinstance(rule, Field):
+            for scope, selector in rule.steps:
+                if scope:
+                    compiled(scope)
+                compiled(selector)
+        elif isinstance(rule, Pairs):
+            compiled(rule.items), compiled(rule.label), compiled(rule.value)
+        elif isinstance(rule, Groups):
+            compiled(rule.items), compiled(rule.title), compiled(rule.entries)
+        elif isinstance(rule, Fill):
+            compiled(rule.block)
+            compile_schema(rule.fields)
+    return schema
+
+
+for _schema in (DEALER_PAGE_SCHEMA, AD_PAGE_SCHEMA):
+    compile_schema(_schema)
+compiled(DEALER_LIST_ROW), compiled(DEALER_LIST_LINK)
+
+
+# --------------------------
+# Selector profiling: hit rate and cost of every lookup, per selector
+# (a selector whose hit rate drops to zero is the first sign of a markup change)
+# --------------------------
+def _profile(selector, hit, start):
+    metrics.count("selector_lookups", selector=selector, result="hit" if hit else "miss")
+    metrics.count("selector_seconds", time.perf_counter() - start, selector=selector)
+
+
+def _select_one(selector, root):
+    start = time.perf_counter()
+    el = compiled(selector).select_one(root)
+    _profile(selector, el is not None, start)
+    return el
+
+
+def _select(selector, root) -> list:
+    start = time.perf_counter()
+    els = compiled(selector).select(root)
+    _profile(selector, bool(els), start)
+    return els
+
+
+def _fallback_value(fallback, soup) -> str:
+    start = time.perf_counter()
+    value = fallback(soup)
+    _profile(f"{fallback.__name__}()", bool(value), start)
+    return value
+
+
+# --------------------------
+# Engine: apply a schema to one parsed page
+# --------------------------
+def _field_value(field: Field, soup):
+    # returns None when no step matched an element at all
+    matched = False
+    value = ""
+    for scope, selector in field.steps:
+        root = _select_one(scope, soup) if scope else soup
+        if root is None:
+            continue
+        el = _select_one(selector, root)
+        if el is None:
+            continue
+        matched = True
+        value = field.extract(el)
+        if value:
+            break
+    if not value and field.fallback:
+        value = _fallback_value(field.fallback, soup)
+    if not matched and not value:
+        return None
+    return field.normalize(value) if field.normalize else value
+
+
+def apply_schema(schema, soup, data: dict) -> dict:
+    for rule in schema:
+        if isinstance(rule, Field):
+            value = _field_value(rule, soup)
+            if value is None:
+                if rule.optional:
+                    continue
+                value = rule.normalize("") if rule.normalize else ""
+            data[rule.name] = value
+
+        elif isinstance(rule, Pairs):
+            for item in _select(rule.items, soup):
+                label = _select_one(rule.label, item)
+                value = _select_one(rule.value, item)
+                if not label or (rule.require_value and not value):
+                    continue
+                label_text = label.get_text(strip=True)
+                if value:
+                    value_text = value.get_text(strip=True)
+                elif rule.value_from_item:
+                    value_text = item.get_text(strip=True).replace(label_text, "").strip()
+                else:
+                    value_text = ""
+                data[normalize_field_name(label_text) or label_text] = value_text
+
+        elif isinstance(rule, Groups):
+            for group in _select(rule.items, soup):
+                title = _select_one(rule.title, group)
+                if not title:
+                    continue
+                entries = [e.get_text(strip=True) for e in _select(rule.entries, group)]
+                if rule.skip_empty:
+                    entries = [e for e in entries if e]
+                data[title.get_text(strip=True)] = rule.separator.join(entries)
+
+        elif isinstance(rule, Fill):
+            # nothing missing (e.g. the dealer registry already knows it): skip the block lookup
+            if all(data.get(field.name) for field in rule.fields):
+                continue
+            block = _select_one(rule.block, soup)
+            if not block:
+                continue
+            for field in rule.fields:
+                if not data.get(field.name):
+                    value = _field_value(field, block)
+                    data[field.name] = value or ""
+    return data
+
+
+# --------------------------
+# Page-level entry points
+# --------------------------
+def extract_dealer_info_from_dealer_page(soup) -> dict:
+    return apply_schema(DEALER_PAGE_SCHEMA, soup, {})
+
+
+def extract_vehicle(soup, url, dealer_info) -> dict:
+    # start with dealer info; ad page dealer fields only fill what it lacks
+    return apply_schema(AD_PAGE_SCHEMA, soup, {**dealer_info, "Ad URL": url})
+
+
+def extract_dealer_links(soup) -> list:
+    # [(dealer name, dealer url)] from the /dealers/ page
+    dealers = []
+    for row in _select(DEALER_LIST_ROW, soup):
+        a = _select_one(DEALER_LIST_LINK, row)
+        if a and a["href"]:
+            dealers.append((a.get_text(strip=True), a["href"]))
+    return dealers
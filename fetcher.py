@@ -0,0 +1,139 @@
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+
+# Number of ad pages fetched at the same time
+DEFAULT_WORKERS = 4
+
+# Adaptive limiter bounds, in requests per second
+DEFAULT_START_RATE = 4.0
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_MAX_RATE = 8.0
+# Additive increase (requests/second gained per second of healthy responses)
+RATE_INCREASE = 0.5
+# Multiplicative decrease on overload
+RATE_DECREASE = 0.5
+# Latency counts as rising once the recent average exceeds the baseline by this factor
+LATENCY_FACTOR = 2.0
+BACKOFF_STATUSES = (429, 500, 502, 503, 504)
+
+
+# --------------------------
+# Adaptive token bucket (AIMD): speeds up while the site answers quickly,
+# halves the rate on 429/5xx, errors or rising latency
+# --------------------------
+class AdaptiveRateLimit:
+    # state is a multiprocessing.Array("d", STATE_SIZE) so every process of a
+    # parallel crawl can share one budget
+    RATE, TOKENS, UPDATED, FAST_LATENCY, BASE_LATENCY, DECREASED = range(6)
+    STATE_SIZE = 6
+
+    def __init__(self, start_rate: float = DEFAULT_START_RATE, min_rate: float = DEFAULT_MIN_RATE,
+                 max_rate: float = DEFAULT_MAX_RATE, burst: float = 1.0, state=None):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.burst = burst
+        self.state = state if state is not None else multiprocessing.Array("d", self.STATE_SIZE)
+        with self.state.get_lock():
+            if self.state[self.RATE] == 0:
+                self.state[self.RATE] = min(max(start_rate, self.min_rate), self.max_rate)
+                self.state[self.TOKENS] = burst
+                self.state[self.UPDATED] = time.monotonic()
+        metrics.gauge("request_rate", self.rate)
+
+    @property
+    def rate(self) -> float:
+        return self.state[self.RATE]
+
+    def wait(self, url: str):
+        s = self.state
+        with s.get_lock():
+            now = time.monotonic()
+            rate = s[self.RATE]
+            # take a token now; a negative balance is a reservation to wait for
+            tokens = min(self.burst, s[self.TOKENS] + (now - s[self.UPDATED]) * rate) - 1
+            s[self.TOKENS] = tokens
+            s[self.UPDATED] = now
+        if tokens < 0:
+            time.sleep(-tokens / rate)
+
+    def feedback(self, status, latency):
+        # status None means the request failed without a response
+        s = self.state
+        with s.get_lock():
+            now = time.monotonic()
+            rising = False
+            if latency is not None:
+                fast, base = s[self.FAST_LATENCY], s[self.BASE_LATENCY]
+                s[self.FAST_LATENCY] = latency if not fast else fast * 0.7 + latency * 0.3
+                s[self.BASE_LATENCY] = latency if not base else base * 0.95 + latency * 0.05
+                rising = bool(base) and s[self.FAST_LATENCY] > base * LATENCY_FACTOR
+
+            rate = s[self.RATE]
+            if status is None or status in BACKOFF_STATUSES or rising:
+                # one cut per cooldown, so a burst of in-flight failures does not collapse the rate
+                if now - s[self.DECREASED] >= max(1.0, s[self.FAST_LATENCY]):
+                    rate = max(self.min_rate, rate * RATE_DECREASE)
+                    s[self.DECREASED] = now
+            else:
+                # + RATE_INCREASE requests/second per second of healthy responses
+                rate = min(self.max_rate, rate + RATE_INCREASE / rate)
+            if rate != s[self.RATE]:
+                # settle tokens earned at the old rate before switching
+                s[self.TOKENS] = min(self.burst, s[self.TOKENS] + (now - s[self.UPDATED]) * s[self.RATE])
+                s[self.UPDATED] = now
+                s[self.RATE] = rate
+        metrics.gauge("request_rate", rate)
+
+
+_limiter = AdaptiveRateLimit()
+
+
+def set_rate_limiter(limiter):
+    global _limiter
+    _limiter = limiter
+
+
+def wait_turn(url: str):
+    # every outgoing request waits here first: http_client.fetch calls it,
+    # browser page loads and clicks call it themselves
+    _limiter.wait(url)
+
+
+def report_response(status, latency):
+    # http_client reports every response (or failure) here so the limiter can adapt
+    feedback = getattr(_limiter, "feedback", None)
+    if feedback:
+        feedback(status, latency)
+
+
+# --------------------------
+# Run func over urls with bounded concurrency, results in input order
+# --------------------------
+def fetch_ordered(urls, func, workers: int = DEFAULT_WORKERS):
+    # yields (url, result, error) for every url, in the order given
+    def task(url):
+        try:
+            return func(url), None
+        except Exception as e:
+            return None, e
+
+    if workers <= 1:
+        for url in urls:
+            result, error = task(url)
+            yield url, result, error
+        return
+
+    # keep only a small window of results in flight so memory stays bounded
+    window = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for url in urls:
+            window.append((url, pool.submit(task, url)))
+            if len(window) >= workers * 2:
+                done_url, future = window.popleft()
+                yield (done_url, *future.result())
+        while window:
+            done_url, future = window.popleft()
+            yield (done_url, *future.result())
@@ -0,0 +1,121 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import metrics
+from fetcher import report_response, wait_turn
+
+# Seconds: (connect, read)
+DEFAULT_TIMEOUT = (5, 20)
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF = 0.5
+DEFAULT_POOL_SIZE = 16
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+def _accept_encoding() -> str:
+    # urllib3 only decodes brotli when one of these packages is installed
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return "gzip, deflate, br"
+        except ImportError:
+            continue
+    return "gzip, deflate"
+
+
+_settings = {
+    "timeout": DEFAULT_TIMEOUT,
+    "retries": DEFAULT_RETRIES,
+    "backoff": DEFAULT_BACKOFF,
+    "pool_size": DEFAULT_POOL_SIZE,
+}
+_session = None
+_session_lock = threading.Lock()
+# hook(method, url, kwargs, response) after every fetch (e.g. fixture recording)
+_response_hooks = []
+
+
+# --------------------------
+# Session configuration
+# --------------------------
+def configure(timeout=None, retries=None, backoff=None, pool_size=None):
+    global _session
+    for key, value in (("timeout", timeout), ("retries", retries), ("backoff", backoff), ("pool_size", pool_size)):
+        if value is not None:
+            _settings[key] = value
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=_settings["retries"],
+        backoff_factor=_settings["backoff"],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=("GET", "HEAD", "POST"),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=_settings["pool_size"],
+        pool_maxsize=_settings["pool_size"],
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": _accept_encoding(),
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+# --------------------------
+# Shared fetch entry point
+# --------------------------
+def fetch(url, method="GET", timeout=None, **kwargs) -> requests.Response:
+    # one limiter token per request, whoever the caller is
+    wait_turn(url)
+    start = time.perf_counter()
+    try:
+        response = get_session().request(method, url, timeout=timeout or _settings["timeout"], **kwargs)
+    except Exception as e:
+        metrics.record_error("fetch", e)
+        report_response(None, None)
+        raise
+    elapsed = time.perf_counter() - start
+    report_response(response.status_code, elapsed)
+    metrics.observe("fetch", elapsed)
+    metrics.count("http_responses", status=response.status_code)
+    body = len(response.content)
+    try:
+        # bytes read off the wire (before gzip/brotli decoding)
+        wire = response.raw.tell() or body
+    except Exception:
+        wire = body
+    metrics.count("bytes_downloaded", wire)
+    metrics.count("bytes_decoded", body)
+    for hook in _response_hooks:
+        hook(method, url, kwargs, response)
+    return response
+
+
+def add_response_hook(hook):
+    _response_hooks.append(hook)
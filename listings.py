@@ -0,0 +1,257 @@
+import hashlib
+import re
+import time
+from urllib.parse import urljoin, urlsplit
+from bs4 import BeautifulSoup
+import metrics
+from browser_pool import get_browser_pool
+from fetcher import report_response, wait_turn
+from http_client import fetch
+from parsing import make_soup
+
+LISTING_ROW_SELECTOR = ".car-listing-row.row.row-3"
+SHOW_MORE_XPATH = (
+    "//a[@class='heading-font']/span[contains(translate(text(), "
+    "'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'show more')]/.."
+)
+
+# Endpoint and action behind the dealer page "Show more" button
+AJAX_PATH = "/wp-admin/admin-ajax.php"
+AJAX_ACTION = "stm_ajax_dealer_load_cars"
+MAX_AJAX_PAGES = 200
+# Seconds to wait for new rows after a browser "Show more" click
+SHOW_MORE_TIMEOUT = 10
+
+# "http": replay the AJAX request only; "browser": expand with Chrome;
+# "auto": replay, fall back to Chrome if the button can't be replayed
+LISTING_MODES = ("http", "auto", "browser")
+DEFAULT_LISTING_MODE = "http"
+
+_ARG_RE = re.compile(r"""'([^']*)'|"([^"]*)"|([\w.\-]+)""")
+_NONCE_RE = re.compile(r"""(?:security|nonce)["']?\s*[:=]\s*["']([0-9a-f]{6,})["']""", re.I)
+
+
+# --------------------------
+# Ad links on a listing page / AJAX fragment
+# --------------------------
+def extract_ad_links(soup: BeautifulSoup, rows_selector=LISTING_ROW_SELECTOR) -> list:
+    links = []
+    containers = soup.select(rows_selector) if rows_selector else [soup]
+    for listing in containers:
+        for a_tag in listing.find_all("a", href=True):
+            if "/listings/" in a_tag["href"]:
+                links.append(a_tag["href"])
+    return links
+
+
+# Parts of a listing card that change when an ad is repriced or sold
+CARD_FINGERPRINT_SELECTORS = (".price", ".special-label", ".sold", ".label-sold")
+
+
+def _card_fingerprint(card) -> str:
+    parts = [el.get_text(" ", strip=True) for sel in CARD_FINGERPRINT_SELECTORS for el in card.select(sel)]
+    if not any(parts):
+        # unknown card layout: fall back to the whole card text
+        parts = [" ".join(card.get_text(" ", strip=True).split())]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _card_of(a_tag, href, listing):
+    # widest ancestor holding this ad alone: stops below the row container, at
+    # <body> (lxml wraps AJAX fragments in html/body), or before a sibling ad
+    card = a_tag
+    while True:
+        parent = card.parent
+        if parent is None or parent is listing or parent.name in ("body", "html", "[document]"):
+            return card
+        if any(a["href"] != href for a in parent.find_all("a", href=True) if "/listings/" in a["href"]):
+            return card
+        card = parent
+
+
+def extract_ad_cards(soup: BeautifulSoup, rows_selector=LISTING_ROW_SELECTOR) -> dict:
+    # ad link -> fingerprint of its listing card (price/status), for delta runs
+    cards = {}
+    containers = soup.select(rows_selector) if rows_selector else [soup]
+    for listing in containers:
+        for a_tag in listing.find_all("a", href=True):
+            href = a_tag["href"]
+            if "/listings/" not in href or href in cards:
+                continue
+            cards[href] = _card_fingerprint(_card_of(a_tag, href, listing))
+    return cards
+
+
+def _find_show_more(soup: BeautifulSoup):
+    for a_tag in soup.select("a.heading-font"):
+        span = a_tag.find("span")
+        if span and "show more" in span.get_text(strip=True).lower():
+            return a_tag
+    return None
+
+
+def _show_more_request(button, page_url: str, nonce: str | None) -> dict | None:
+    # Pull ajax url / user id / offset out of the button's onclick call or data-* attributes
+    params = {}
+    onclick = button.get("onclick", "")
+    call = onclick[onclick.find("(") + 1:onclick.rfind(")")] if "(" in onclick else ""
+    numbers = []
+    for quoted1, quoted2, bare in _ARG_RE.findall(call):
+        arg = quoted1 or quoted2 or bare
+        if arg.startswith("http"):
+            params["ajax_url"] = arg
+        elif arg.isdigit():
+            numbers.append(arg)
+        elif arg in ("popular", "no", "yes", "cars"):
+            params["popular"] = arg
+    if numbers:
+        params["user_id"] = numbers[0]
+    if len(numbers) > 1:
+        params["offset"] = numbers[1]
+
+    for attr in ("user_id", "offset", "popular"):
+        value = button.get(f"data-{attr}") or button.get(f"data-{attr.replace('_', '-')}")
+        if value:
+            params[attr] = value
+
+    if "user_id" not in params:
+        return None
+    base = "{0.scheme}://{0.netloc}".format(urlsplit(page_url))
+    data = {
+        "action": AJAX_ACTION,
+        "user_id": params["user_id"],
+        "offset": params.get("offset", "0"),
+        "popular": params.get("popular", "no"),
+    }
+    if nonce:
+        data["security"] = nonce
+    return {"url": urljoin(base, params.get("ajax_url", AJAX_PATH)), "data": data}
+
+
+# --------------------------
+# Browserless: first page + replayed "Show more" AJAX calls
+# --------------------------
+def _collect_via_http(dealer_url: str):
+    response = fetch(dealer_url)
+    response.raise_for_status()
+    soup = make_soup(response.text)
+    links = extract_ad_links(soup)
+    cards = extract_ad_cards(soup)
+
+    button = _find_show_more(soup)
+    if not button:
+        return soup, links, cards, True
+
+    nonce_match = _NONCE_RE.search(response.text)
+    request = _show_more_request(button, dealer_url, nonce_match.group(1) if nonce_match else None)
+    if not request:
+        print("⚠️ Could not replay the Show more request")
+        return soup, links, cards, False
+
+    seen = set(links)
+    offset = int(request["data"]["offset"]) if str(request["data"]["offset"]).isdigit() else 0
+    for page in range(MAX_AJAX_PAGES):
+        request["data"]["offset"] = str(offset)
+        print("🔘 Loading more listings...")
+        metrics.count("show_more_requests")
+        resp = fetch(request["url"], method="POST", data=request["data"])
+        if resp.status_code != 200:
+            print(f"⚠️ Show more request returned HTTP {resp.status_code}")
+            return soup, links, cards, False
+        try:
+            payload = resp.json()
+        except ValueError:
+            payload = {"html": resp.text}
+        if not isinstance(payload, dict):
+            # admin-ajax answers 0 / -1 when it rejects the replayed call
+            print(f"⚠️ Show more request was rejected ({str(payload)[:40]})")
+            return soup, links, cards, False
+
+        fragment = make_soup(payload.get("html") or "")
+        batch = extract_ad_links(fragment, rows_selector=None)
+        new = [link for link in batch if link not in seen]
+        if not new:
+            if page == 0:
+                # the button was there but the first call brought nothing
+                print("⚠️ Show more request returned no listings")
+                return soup, links, cards, False
+            break
+        links.extend(batch)
+        seen.update(batch)
+        for link, fingerprint in extract_ad_cards(fragment, rows_selector=None).items():
+            cards.setdefault(link, fingerprint)
+
+        if payload.get("new_offset") not in (None, ""):
+            offset = int(payload["new_offset"])
+        else:
+            offset += len(dict.fromkeys(batch))
+        # the endpoint sends an empty/missing button once everything is loaded
+        if "button" in payload and not payload["button"]:
+            break
+    else:
+        print(f"⚠️ Stopped after {MAX_AJAX_PAGES} Show more requests")
+        return soup, links, cards, False
+
+    print("✅ No more Show more button.")
+    return soup, links, cards, True
+
+
+# --------------------------
+# Browser fallback: click "Show more" in a pooled headless Chrome
+# --------------------------
+def _collect_via_browser(dealer_url: str):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    with get_browser_pool().acquire() as driver:
+        wait_turn(dealer_url)
+        driver.get(dealer_url)
+        with metrics.timed("show_more_loop"):
+            while True:
+                try:
+                    show_more = WebDriverWait(driver, 5).until(
+                        EC.element_to_be_clickable((By.XPATH, SHOW_MORE_XPATH))
+                    )
+                except Exception:
+                    print("✅ No more Show more button.")
+                    break
+                # each click is an AJAX request, so it goes through the shared limiter;
+                # its latency is how long the new rows take to appear
+                rows = len(driver.find_elements(By.CSS_SELECTOR, LISTING_ROW_SELECTOR))
+                wait_turn(dealer_url)
+                print("🔘 Clicking Show more...")
+                started = time.perf_counter()
+                driver.execute_script("arguments[0].click();", show_more)
+                metrics.count("show_more_clicks")
+                try:
+                    WebDriverWait(driver, SHOW_MORE_TIMEOUT).until(
+                        lambda d: len(d.find_elements(By.CSS_SELECTOR, LISTING_ROW_SELECTOR)) > rows
+                    )
+                    report_response(200, time.perf_counter() - started)
+                except Exception:
+                    # nothing new arrived in time; back off and stop expanding
+                    report_response(None, None)
+                    print("⚠️ Show more click loaded no new listings")
+                    break
+        page_source = driver.page_source
+    soup = make_soup(page_source)
+    return soup, extract_ad_links(soup), extract_ad_cards(soup)
+
+
+# --------------------------
+# Dealer page soup + every ad link on it (in page order, may repeat)
+# + link -> listing card fingerprint
+# --------------------------
+def collect_dealer_listings(dealer_url: str, mode: str = DEFAULT_LISTING_MODE):
+    if mode not in LISTING_MODES:
+        raise ValueError(f"Unknown listing mode {mode!r}, expected one of {LISTING_MODES}")
+    with metrics.timed("listing_expand"):
+        if mode == "browser":
+            return _collect_via_browser(dealer_url)
+
+        soup, links, cards, complete = _collect_via_http(dealer_url)
+        if not complete and mode == "auto":
+            print("🌐 Falling back to browser expansion")
+            return _collect_via_browser(dealer_url)
+        return soup, links, cards
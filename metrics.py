@@ -0,0 +1,212 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+# Per-selector counters from the extraction engine, summarized in their own table
+SELECTOR_COUNTERS = ("selector_lookups", "selector_seconds")
+
+_lock = threading.Lock()
+_counters = {}      # (name, labels) -> value
+_gauges = {}        # (name, labels) -> value
+_histograms = {}    # name -> Histogram
+_started = time.time()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# --------------------------
+# Latency histogram
+# --------------------------
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: dict):
+        self.buckets = [a + b for a, b in zip(self.buckets, other["buckets"])]
+        self.count += other["count"]
+        self.total += other["total"]
+        self.max = max(self.max, other["max"])
+
+    def quantile(self, q) -> float:
+        # upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {"buckets": list(self.buckets), "count": self.count, "total": self.total, "max": self.max}
+
+
+# --------------------------
+# Recording
+# --------------------------
+def count(name, value=1, **labels):
+    with _lock:
+        k = _key(name, labels)
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, seconds):
+    with _lock:
+        _histograms.setdefault(name, Histogram()).observe(seconds)
+
+
+@contextmanager
+def timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def record_error(stage, error):
+    count("errors_total", stage=stage, type=type(error).__name__)
+
+
+# --------------------------
+# Snapshots (also used to ship worker-process metrics to the parent)
+# --------------------------
+def snapshot(reset=False) -> dict:
+    with _lock:
+        snap = {
+            "counters": [[n, dict(l), v] for (n, l), v in _counters.items()],
+            "gauges": [[n, dict(l), v] for (n, l), v in _gauges.items()],
+            "histograms": {n: h.as_dict() for n, h in _histograms.items()},
+        }
+        if reset:
+            _counters.clear()
+            _histograms.clear()
+    return snap
+
+
+def merge(snap: dict):
+    with _lock:
+        for name, labels, value in snap["counters"]:
+            k = _key(name, labels)
+            _counters[k] = _counters.get(k, 0) + value
+        for name, labels, value in snap["gauges"]:
+            _gauges[_key(name, labels)] = value
+        for name, hist in snap["histograms"].items():
+            _histograms.setdefault(name, Histogram()).merge(hist)
+
+
+# --------------------------
+# Output: JSON lines, Prometheus text file, summary table
+# --------------------------
+def write_jsonl(path):
+    snap = snapshot()
+    snap["time"] = time.time()
+    snap["elapsed"] = time.time() - _started
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(snap) + "\n")
+
+
+def _prom_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+def write_prometheus(path, prefix="autostream_"):
+    snap = snapshot()
+    lines = []
+    for name, labels, value in snap["counters"]:
+        lines.append(f"{prefix}{name}{_prom_labels(labels)} {value}")
+    for name, labels, value in snap["gauges"]:
+        lines.append(f"{prefix}{name}{_prom_labels(labels)} {value}")
+    for name, hist in snap["histograms"].items():
+        metric = f"{prefix}{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, hist["buckets"]):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"{metric}_sum {hist['total']}")
+        lines.append(f"{metric}_count {hist['count']}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def write_metrics(path):
+    if path.endswith(".prom"):
+        write_prometheus(path)
+    else:
+        write_jsonl(path)
+
+
+def _print_selectors(snap):
+    # one row per selector, lowest hit rate first
+    stats = {}
+    for name, labels, value in snap["counters"]:
+        if name in SELECTOR_COUNTERS:
+            row = stats.setdefault(labels["selector"], {"hit": 0, "miss": 0, "seconds": 0.0})
+            row[labels.get("result", "seconds")] += value
+    if not stats:
+        return
+    print(f"   {'selector':<52} {'lookups':>8} {'hit %':>7} {'mean us':>8}")
+    rows = [(s, r["hit"] + r["miss"], r["hit"], r["seconds"]) for s, r in stats.items()]
+    for selector, lookups, hits, seconds in sorted(rows, key=lambda r: (r[2] / max(r[1], 1), r[0])):
+        name = selector if len(selector) <= 52 else selector[:49] + "..."
+        print(f"   {name:<52} {lookups:>8g} {100.0 * hits / max(lookups, 1):>6.1f}% "
+              f"{1e6 * seconds / max(lookups, 1):>8.1f}")
+
+
+def print_summary():
+    snap = snapshot()
+    elapsed = time.time() - _started
+    print(f"\n📊 Run metrics ({elapsed:.1f}s)")
+    if snap["histograms"]:
+        print(f"   {'timing':<16} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for name, data in sorted(snap["histograms"].items()):
+            h = Histogram()
+            h.merge(data)
+            mean = h.total / h.count if h.count else 0.0
+            print(f"   {name:<16} {h.count:>7} {h.total:>9.2f} {mean * 1000:>9.1f} "
+                  f"{h.quantile(0.5) * 1000:>8.1f} {h.quantile(0.95) * 1000:>8.1f} {h.max * 1000:>8.1f}")
+    counters = {}
+    for name, labels, value in snap["counters"]:
+        if name not in SELECTOR_COUNTERS:
+            counters.setdefault(name, []).append((labels, value))
+    for name in sorted(counters):
+        for labels, value in sorted(counters[name], key=lambda x: -x[1]):
+            label = _prom_labels(labels)
+            if name == "bytes_downloaded":
+                print(f"   {name + label:<48} {value / 1e6:>10.2f} MB")
+            else:
+                print(f"   {name + label:<48} {value:>10g}")
+    for name, labels, value in snap["gauges"]:
+        print(f"   {name + _prom_labels(labels):<48} {value:>10.2f}")
+    _print_selectors(snap)
+    ads = sum(v for n, _, v in snap["counters"] if n == "ads_scraped")
+    failed = sum(v for n, l, v in snap["counters"] if n == "errors_total" and l.get("stage") == "ad")
+    if ads or failed:
+        print(f"   ad error rate: {100.0 * failed / (ads + failed):.2f}%")
@@ -0,0 +1,145 @@
+import re
+from dataclasses import dataclass, field
+import metrics
+
+# pandas (optional) vectorizes the batches; imported on first use, it is slow to load
+_pandas = []
+
+
+def _pd():
+    if not _pandas:
+        try:
+            import pandas
+        except ImportError:
+            pandas = None
+        if pandas is not None and not _vectorized_agrees(pandas):
+            print("⚠️ pandas parses the typed columns differently here; using the pure-Python parser")
+            pandas = None
+        _pandas.append(pandas)
+    return _pandas[0]
+
+# Records buffered before a batch is normalized
+NORMALIZE_BATCH_ROWS = 500
+
+
+# --------------------------
+# Typed numeric columns derived from raw page strings
+# --------------------------
+@dataclass(frozen=True)
+class NumericColumn:
+    source: str                 # raw column, e.g. "Vehicle Price"
+    name: str                   # typed column written next to it
+    pattern: str                # regex with a "num" group and an optional "unit" group
+    units: dict = field(default_factory=dict)   # lower-case unit -> multiplier
+    kind: type = int
+    minimum: float = None       # smaller results are misreads, not values
+
+
+_NUMBER = r"(?P<num>\d[\d,]*(?:\.\d+)?)"
+
+TYPED_COLUMNS = (
+    # "Rs. 12,500,000", "Rs 1.25 Mn", "45 Lakhs"
+    NumericColumn("Vehicle Price", "Price (Rs)", _NUMBER + r"\s*(?P<unit>mn|million|lakhs?|lks?)?\b",
+                  {"mn": 1_000_000, "million": 1_000_000, "lakh": 100_000, "lakhs": 100_000,
+                   "lk": 100_000, "lks": 100_000}),
+    # "85,000 km", "85k km"
+    NumericColumn("Mileage", "Mileage (km)", _NUMBER + r"\s*(?P<unit>k(?!m))?", {"k": 1000}),
+    # "1500 cc", "1,500", "1500 cc / 80 kW", "2.0L"; a bare kW figure is not a displacement,
+    # and a bare "2.0" is neither
+    NumericColumn("Engine CC / kw", "Engine (cc)",
+                  _NUMBER + r"\s*(?P<unit>l(?:itres?|iters?|tr)?\b)?(?![\d,.])(?!\s*k\s*w)",
+                  {"l": 1000, "litre": 1000, "litres": 1000, "liter": 1000, "liters": 1000, "ltr": 1000},
+                  minimum=50),
+    NumericColumn("Engine CC / kw", "Engine (kW)", _NUMBER + r"\s*k\s*w", kind=float),
+    NumericColumn("Year of Manufacture", "Year", r"(?P<num>\b(?:19|20)\d{2}\b)"),
+)
+
+# typed column name -> Python type, for sinks that declare column types
+NUMERIC_TYPES = {c.name: c.kind for c in TYPED_COLUMNS}
+
+_compiled = {c.name: re.compile(c.pattern, re.I) for c in TYPED_COLUMNS}
+
+
+def typed_headers(headers) -> list:
+    # headers with every typed column placed right after its raw source column
+    out = []
+    for h in headers:
+        out.append(h)
+        out.extend(c.name for c in TYPED_COLUMNS if c.source == h and c.name not in headers)
+    return out
+
+
+def parse_value(column: NumericColumn, raw):
+    # one raw string -> number, or None when it holds no usable figure
+    if not isinstance(raw, str):
+        return raw if isinstance(raw, (int, float)) else None
+    m = _compiled[column.name].search(raw)
+    if not m:
+        return None
+    value = float(m.group("num").replace(",", ""))
+    unit = (m.groupdict().get("unit") or "").lower()
+    value *= column.units.get(unit, 1)
+    if column.minimum is not None and value < column.minimum:
+        return None
+    return round(value) if column.kind is int else value
+
+
+def _parse_column_vectorized(pd, column: NumericColumn, raws: list) -> list:
+    s = pd.Series(raws, dtype="string")
+    parts = s.str.extract(column.pattern, flags=re.I)
+    value = pd.to_numeric(parts["num"].str.replace(",", "", regex=False), errors="coerce")
+    if "unit" in parts:
+        value = value * parts["unit"].fillna("").str.lower().map(column.units).fillna(1.0).astype("float64")
+    if column.minimum is not None:
+        value = value.where(value >= column.minimum)
+    if column.kind is int:
+        value = value.round().astype("Int64")
+    return [None if v is pd.NA or v != v else column.kind(v) for v in value.astype(object)]
+
+
+# Raw values the pandas path must parse exactly like parse_value before it is used
+SELF_CHECK_SAMPLES = {
+    "Vehicle Price": ["Rs. 12,500,000", "Rs 1.25 Mn", "45 Lakhs", "12 lks", "Rs 4.5 million", "Negotiable", ""],
+    "Mileage": ["85,000 km", "85k km", "0 km", "120000", "n/a", ""],
+    "Engine CC / kw": ["1500 cc", "1,500", "1500 cc / 80 kW", "80 kW", "2.0L", "1.5 litre", "2.0", "660cc", ""],
+    "Year of Manufacture": ["2015", "Manufactured 1998", "n/a", ""],
+}
+
+
+def _vectorized_agrees(pd) -> bool:
+    # same values and same Python types, or the pandas path stays off
+    try:
+        for column in TYPED_COLUMNS:
+            raws = SELF_CHECK_SAMPLES[column.source]
+            expected = [parse_value(column, raw) if raw else None for raw in raws]
+            got = _parse_column_vectorized(pd, column, raws)
+            if [(v, type(v)) for v in got] != [(v, type(v)) for v in expected]:
+                return False
+    except Exception:
+        return False
+    return True
+
+
+def normalize_batch(records: list) -> list:
+    # adds the typed columns to every record in place;
+    # returns [(ad url, raw column, raw value)] for values nothing could be parsed from
+    parsed = {}
+    pd = _pd()
+    for column in TYPED_COLUMNS:
+        raws = [r.get(column.source) or "" for r in records]
+        if pd is not None:
+            values = _parse_column_vectorized(pd, column, raws)
+        else:
+            values = [parse_value(column, raw) if raw else None for raw in raws]
+        for record, value in zip(records, values):
+            record[column.name] = value
+        parsed.setdefault(column.source, []).append(values)
+
+    failures = []
+    for source, columns in parsed.items():
+        for i, values in enumerate(zip(*columns)):
+            raw = records[i].get(source)
+            if raw and all(v is None for v in values):
+                failures.append((records[i].get("Ad URL", ""), source, raw))
+                metrics.count("normalize_failures", column=source)
+    return failures
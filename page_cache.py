@@ -0,0 +1,124 @@
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = ".page_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_AGE = 14 * 24 * 3600  # seconds since the entry was last validated
+
+# Bump when the extraction output changes so old records are not reused
+CACHE_VERSION = 1
+
+
+# --------------------------
+# On-disk ad page cache: validators + extracted record per URL
+# --------------------------
+class PageCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, record TEXT,"
+            " version INTEGER, stored_at REAL, used_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_used_at ON pages (used_at)")
+        self._conn.commit()
+        self.evict()
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, record FROM pages WHERE url = ? AND version = ?",
+                (url, CACHE_VERSION),
+            ).fetchone()
+        if not row:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "record": row[2]}
+
+    @staticmethod
+    def conditional_headers(entry) -> dict:
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def reuse(self, url, entry, dealer_info) -> dict:
+        # 304: the page is unchanged, hand back the record extracted last time
+        with self._lock:
+            self.hits += 1
+            self._conn.execute("UPDATE pages SET used_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        data = json.loads(entry["record"])
+        data.update({k: v for k, v in dealer_info.items() if v})
+        return data
+
+    def store(self, url, response, record):
+        with self._lock:
+            self.misses += 1
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if response.status_code != 200 or not (etag or last_modified):
+                return
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(record, ensure_ascii=False), CACHE_VERSION, now, now),
+            )
+            self._conn.commit()
+            self.stores += 1
+
+    def evict(self):
+        # drop entries not validated within max_age, then least recently used above max_entries
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM pages WHERE used_at < ?", (time.time() - self.max_age,))
+            removed = cur.rowcount
+            cur = self._conn.execute(
+                "DELETE FROM pages WHERE url IN ("
+                " SELECT url FROM pages ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            removed += cur.rowcount
+            self._conn.commit()
+            self.evictions += removed
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        print(f"🗄️ Page cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+              f"{self.stores} stored, {self.evictions} evicted")
+
+    def close(self):
+        self.evict()
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+
+
+def enable_page_cache(path=DEFAULT_CACHE_PATH, **kwargs) -> PageCache:
+    global _cache
+    if _cache is None:
+        _cache = PageCache(path, **kwargs)
+    return _cache
+
+
+def get_page_cache():
+    return _cache
+
+
+def close_page_cache():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache.report()
+        _cache = None
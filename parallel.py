@@ -0,0 +1,139 @@
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+import metrics
+from dealer_registry import DEFAULT_TTL, enable_dealer_registry
+from delta import DeltaState
+from fetcher import DEFAULT_WORKERS, AdaptiveRateLimit, set_rate_limiter
+from listings import DEFAULT_LISTING_MODE
+from page_cache import enable_page_cache, get_page_cache
+from scraper import scrape_dealer
+
+DEFAULT_PROCESSES = 4
+# Ceiling for the adaptive request rate across all processes together
+DEFAULT_RATE = 8.0
+# Records waiting for the writer before workers block
+RESULT_QUEUE_SIZE = 1000
+
+DONE = "done"
+FAILED = "failed"
+
+_worker = {}
+
+
+# --------------------------
+# Worker process side
+# --------------------------
+def _init_worker(results, rate_state, max_rate, options):
+    _worker["results"] = results
+    _worker["options"] = options
+    set_rate_limiter(AdaptiveRateLimit(max_rate=max_rate, state=rate_state))
+    if options["use_cache"]:
+        enable_page_cache()
+    if options["dealer_ttl"] is not None:
+        enable_dealer_registry(ttl=options["dealer_ttl"])
+    # (path, run id) of the parent's delta state, opened once per worker
+    _worker["delta"] = DeltaState(*options["delta"]) if options["delta"] else None
+
+
+def _crawl_dealer(index, dealer_url):
+    results, options = _worker["results"], _worker["options"]
+    cache = get_page_cache()
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    status = DONE
+    try:
+        scrape_dealer(
+            dealer_url,
+            workers=options["ad_workers"],
+            listing_mode=options["listing_mode"],
+            skip_ads=options["skip_ads"],
+            include_dealer_row=options["include_dealer_row"],
+            pipeline=options["pipeline"],
+            # dealers are already spread over processes: parse in threads, not a nested process pool
+            parse_in_processes=False,
+            delta=_worker["delta"],
+            on_ad=lambda record: results.put((index, record)),
+        )
+    except Exception as e:
+        print(f"❌ Failed to scrape dealer {dealer_url}: {e}")
+        metrics.record_error("dealer", e)
+        status = FAILED
+    # cache counters and metrics travel back with the marker so the parent can report them
+    if cache:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    results.put((index, (status, hits, misses, metrics.snapshot(reset=True))))
+
+
+# --------------------------
+# Parent side: shard dealers over processes, write in dealer order
+# --------------------------
+def crawl_dealers_parallel(dealers, on_ad, on_dealer_done=None, processes=DEFAULT_PROCESSES,
+                           rate=DEFAULT_RATE, ad_workers=DEFAULT_WORKERS,
+                           listing_mode=DEFAULT_LISTING_MODE, skip_ads=(), use_cache=True, pipeline=False,
+                           delta=None, dealer_ttl=DEFAULT_TTL, include_dealer_row=False):
+    # dealer_ttl=None runs the workers without the dealer registry
+    # on_ad(dealer_url, record) runs in this process only, in the same order a
+    # sequential crawl would produce: dealer by dealer, ads in link order
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue(RESULT_QUEUE_SIZE)
+    rate_state = ctx.Array("d", AdaptiveRateLimit.STATE_SIZE)
+    options = {
+        "ad_workers": ad_workers,
+        "listing_mode": listing_mode,
+        "skip_ads": set(skip_ads),
+        "include_dealer_row": include_dealer_row,
+        "use_cache": use_cache,
+        "dealer_ttl": dealer_ttl,
+        "pipeline": pipeline,
+        "delta": (delta.path, delta.run_id) if delta else None,
+    }
+    parent_cache = get_page_cache()
+
+    with ProcessPoolExecutor(processes, mp_context=ctx, initializer=_init_worker,
+                             initargs=(results, rate_state, rate, options)) as pool:
+        futures = [pool.submit(_crawl_dealer, i, url) for i, url in enumerate(dealers)]
+        finished = {}
+        backlog = {}
+        head = 0
+        try:
+            while head < len(dealers):
+                try:
+                    index, item = results.get(timeout=1.0)
+                except queue.Empty:
+                    # a worker that died never sends its marker
+                    for i, future in enumerate(futures):
+                        if i not in finished and future.done() and future.exception():
+                            print(f"❌ Failed to scrape dealer {dealers[i]}: {future.exception()}")
+                            metrics.record_error("dealer", future.exception())
+                            finished[i] = FAILED
+                    index, item = None, None
+
+                if isinstance(item, tuple):
+                    status, hits, misses, worker_metrics = item
+                    finished[index] = status
+                    metrics.merge(worker_metrics)
+                    if parent_cache:
+                        parent_cache.hits += hits
+                        parent_cache.misses += misses
+                elif item is not None:
+                    if index == head:
+                        on_ad(dealers[index], item)
+                    else:
+                        backlog.setdefault(index, []).append(item)
+
+                while head in finished:
+                    if finished.pop(head) == DONE and on_dealer_done:
+                        on_dealer_done(dealers[head])
+                    head += 1
+                    for record in backlog.pop(head, ()):
+                        on_ad(dealers[head], record)
+        except BaseException:
+            # on_ad gave up (e.g. CrawlAborted): drop queued dealers and drain
+            # the results of running ones so their workers can exit
+            pool.shutdown(wait=False, cancel_futures=True)
+            while not all(f.done() for f in futures):
+                try:
+                    results.get(timeout=0.5)
+                except queue.Empty:
+                    pass
+            raise
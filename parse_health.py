@@ -0,0 +1,78 @@
+import hashlib
+import os
+import re
+import threading
+from collections import deque
+import metrics
+
+# One field from each part of the ad page; all of them empty-free on a healthy crawl
+KEY_FIELDS = ("Vehicle Name", "Vehicle Price", "Mileage", "Year of Manufacture")
+
+DEFAULT_SAMPLE_DIR = "parse_samples"
+# Raw pages kept at most (counted on disk, so shared by worker processes)
+MAX_SAMPLES = 50
+
+# Abort once this share of the last ABORT_WINDOW ads lack a key field
+DEFAULT_ABORT_RATE = 0.5
+DEFAULT_ABORT_WINDOW = 50
+
+_sample_lock = threading.Lock()
+
+
+class CrawlAborted(Exception):
+    pass
+
+
+def missing_key_fields(record: dict) -> list:
+    return [f for f in KEY_FIELDS if not record.get(f)]
+
+
+# --------------------------
+# Raw HTML of pages the extraction came back empty on
+# --------------------------
+def _sample_name(url) -> str:
+    slug = re.sub(r"[^\w-]+", "_", url.rstrip("/").rsplit("/", 1)[-1])[:60]
+    return f"{slug}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}.html"
+
+
+def sample_if_broken(url, record: dict, html: str, sample_dir=DEFAULT_SAMPLE_DIR) -> list:
+    # saves the page when key fields are empty; returns the missing fields
+    missing = missing_key_fields(record)
+    if not missing:
+        return missing
+    for field in missing:
+        metrics.count("key_field_empty", field=field)
+    with _sample_lock:
+        os.makedirs(sample_dir, exist_ok=True)
+        path = os.path.join(sample_dir, _sample_name(url))
+        if os.path.exists(path) or len(os.listdir(sample_dir)) >= MAX_SAMPLES:
+            return missing
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"<!-- {url} | empty: {', '.join(missing)} -->\n{html}")
+    metrics.count("parse_samples_saved")
+    return missing
+
+
+# --------------------------
+# Early abort: stop a crawl whose pages stopped parsing
+# --------------------------
+class ParseMonitor:
+    # Sliding window over the latest ads; CrawlAborted once too many lack a
+    # key field, so a markup change doesn't cost a whole crawl of blank rows.
+    def __init__(self, abort_rate=DEFAULT_ABORT_RATE, window=DEFAULT_ABORT_WINDOW):
+        self.abort_rate = abort_rate
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def check(self, record: dict):
+        broken = bool(missing_key_fields(record))
+        with self._lock:
+            self._recent.append(broken)
+            if not self.abort_rate or len(self._recent) < self._recent.maxlen:
+                return
+            rate = sum(self._recent) / len(self._recent)
+        if rate >= self.abort_rate:
+            raise CrawlAborted(
+                f"{rate:.0%} of the last {len(self._recent)} ads lack one of {', '.join(KEY_FIELDS)}; "
+                f"the page markup probably changed (raw pages in {DEFAULT_SAMPLE_DIR}/)"
+            )
@@ -0,0 +1,67 @@
+import os
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+def _default_backend() -> str:
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+# bs4 tree builder used for every page; override with SCRAPER_PARSER=html.parser
+PARSER_BACKEND = os.environ.get("SCRAPER_PARSER") or _default_backend()
+
+# Every element scrape_vehicle reads lives inside one of these (matched by class),
+# or inside a <section> (Seller Notes)
+AD_PAGE_CLASSES = frozenset({
+    "listing-title", "stm_listing_title",           # vehicle name
+    "price", "h3",                                  # vehicle price
+    "special-label",                                # sold badge
+    "single-listing-attribute-boxes",               # main attributes
+    "stm-single-car-listing-data",                  # additional attributes
+    "stm-single-listing-car-features",              # feature groups
+    "dealer-info", "stm-dealer-box", "stm-dealer-info", "stm-seller-info",  # dealer block
+})
+AD_PAGE_TAGS = frozenset({"section"})
+
+
+def _keep_ad_region(name: str, attrs) -> bool:
+    if name in AD_PAGE_TAGS:
+        return True
+    classes = (attrs or {}).get("class") or ()
+    if isinstance(classes, str):
+        classes = classes.split()
+    return not AD_PAGE_CLASSES.isdisjoint(classes)
+
+
+class RegionStrainer(SoupStrainer):
+    # Keeps top-level elements for which keep(name, attrs) is true, with their
+    # whole subtree. bs4 >= 4.13 asks allow_tag_creation(); older versions
+    # call search_tag() with the raw tag name and attributes.
+    def __init__(self, keep):
+        super().__init__()
+        self.keep = keep
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.keep(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        if isinstance(markup_name, str):
+            return markup_name if self.keep(markup_name, markup_attrs) else None
+        return super().search_tag(markup_name, markup_attrs)
+
+
+# Parse only the listing-content regions of an ad page
+AD_PAGE_STRAINER = RegionStrainer(_keep_ad_region)
+
+
+# --------------------------
+# Build a soup with the configured backend
+# --------------------------
+def make_soup(html, parse_only=None, backend=None) -> BeautifulSoup:
+    return BeautifulSoup(html, backend or PARSER_BACKEND, parse_only=parse_only)
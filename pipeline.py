@@ -0,0 +1,219 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import metrics
+from dealer_registry import learn_missing
+from page_cache import get_page_cache
+from parse_health import sample_if_broken
+from scraper import fetch_vehicle_page, parse_vehicle_page
+
+DEFAULT_FETCHERS = 8
+DEFAULT_PARSERS = max(1, (multiprocessing.cpu_count() or 2) - 1)
+# Capacity of each queue between stages
+DEFAULT_QUEUE_SIZE = 32
+REPORT_INTERVAL = 10.0  # seconds between live queue/throughput lines
+
+
+# --------------------------
+# Per-stage counters
+# --------------------------
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    errors: int = 0
+    busy: float = 0.0       # seconds of work, summed over the stage's workers
+    max_depth: int = 0      # deepest the stage's input queue got
+
+
+@dataclass
+class PipelineStats:
+    started: float = field(default_factory=time.monotonic)
+    stages: dict = field(default_factory=lambda: {n: StageStats(n) for n in ("fetch", "parse", "write")})
+    queues: dict = field(default_factory=dict)
+
+    def observe(self, stage, queue):
+        s = self.stages[stage]
+        s.max_depth = max(s.max_depth, queue.qsize())
+
+    def depths(self) -> dict:
+        return {name: q.qsize() for name, q in self.queues.items()}
+
+    def throughput(self, stage) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.stages[stage].items / elapsed if elapsed else 0.0
+
+    def line(self) -> str:
+        depth = self.depths()
+        return "  ".join(
+            f"{name}: {self.throughput(name):.1f}/s q={depth.get(name, 0)}"
+            for name in self.stages
+        )
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        print(f"📈 Pipeline finished in {elapsed:.1f}s")
+        print(f"   {'stage':<6} {'items':>6} {'errors':>6} {'items/s':>8} {'busy s':>8} {'max queue':>9}")
+        for s in self.stages.values():
+            print(f"   {s.name:<6} {s.items:>6} {s.errors:>6} {self.throughput(s.name):>8.2f} "
+                  f"{s.busy:>8.2f} {s.max_depth:>9}")
+
+
+# --------------------------
+# Parser pool, created once and reused across dealers
+# --------------------------
+_parse_pools = {}
+
+
+def get_parse_pool(parsers=DEFAULT_PARSERS, processes=True):
+    key = (parsers, processes)
+    if key not in _parse_pools:
+        if processes:
+            _parse_pools[key] = ProcessPoolExecutor(parsers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            _parse_pools[key] = ThreadPoolExecutor(parsers)
+    return _parse_pools[key]
+
+
+def shutdown_parse_pools():
+    for pool in _parse_pools.values():
+        pool.shutdown()
+    _parse_pools.clear()
+
+
+def _parse_and_report(html, url, dealer_info):
+    # runs in a parser process: its selector counters travel back with the record
+    record = parse_vehicle_page(html, url, dealer_info)
+    return record, metrics.snapshot(reset=True)
+
+
+# --------------------------
+# fetch -> [html queue] -> parse -> [record queue] -> write
+# --------------------------
+async def _run(jobs, on_record, fetchers, parsers, parse_pool, queue_size, stats):
+    loop = asyncio.get_running_loop()
+    cache = get_page_cache()
+    url_q = asyncio.Queue(queue_size)
+    html_q = asyncio.Queue(queue_size)
+    record_q = asyncio.Queue(queue_size)
+    stats.queues = {"fetch": url_q, "parse": html_q, "write": record_q}
+    # caps items between producer and writer, so the reorder buffer stays bounded too
+    in_flight = asyncio.Semaphore(3 * queue_size + fetchers)
+
+    async def produce():
+        for seq, (url, dealer_info) in enumerate(jobs):
+            await in_flight.acquire()
+            await url_q.put((seq, url, dealer_info))
+            stats.observe("fetch", url_q)
+        for _ in range(fetchers):
+            await url_q.put(None)
+
+    async def fetch_stage():
+        fetch_stats = stats.stages["fetch"]
+        while (job := await url_q.get()) is not None:
+            seq, url, dealer_info = job
+            print(f"🔹 Scraping vehicle: {url}")
+            start = time.monotonic()
+            try:
+                response, entry = await asyncio.to_thread(fetch_vehicle_page, url)
+            except Exception as e:
+                fetch_stats.errors += 1
+                await record_q.put((seq, url, None, e))
+                continue
+            finally:
+                fetch_stats.busy += time.monotonic() - start
+            fetch_stats.items += 1
+            if entry:
+                # 304: nothing to parse
+                await record_q.put((seq, url, cache.reuse(url, entry, dealer_info), None))
+            else:
+                await html_q.put((seq, url, dealer_info, response))
+                stats.observe("parse", html_q)
+
+    async def parse_stage():
+        parse_stats = stats.stages["parse"]
+        while (job := await html_q.get()) is not None:
+            seq, url, dealer_info, response = job
+            start = time.monotonic()
+            try:
+                if isinstance(parse_pool, ProcessPoolExecutor):
+                    record, parser_metrics = await loop.run_in_executor(
+                        parse_pool, _parse_and_report, response.text, url, dealer_info
+                    )
+                    metrics.merge(parser_metrics)
+                else:
+                    record = await loop.run_in_executor(parse_pool, parse_vehicle_page, response.text, url, dealer_info)
+            except Exception as e:
+                parse_stats.errors += 1
+                await record_q.put((seq, url, None, e))
+                continue
+            finally:
+                parse_stats.busy += time.monotonic() - start
+                metrics.observe("parse", time.monotonic() - start)
+            parse_stats.items += 1
+            sample_if_broken(url, record, response.text)
+            learn_missing(dealer_info, record)
+            if cache:
+                cache.store(url, response, record)
+            await record_q.put((seq, url, record, None))
+            stats.observe("write", record_q)
+
+    async def write_stage():
+        # records are written in job order; out-of-order ones wait here
+        write_stats = stats.stages["write"]
+        waiting = {}
+        next_seq = 0
+        while (item := await record_q.get()) is not None:
+            waiting[item[0]] = item
+            while next_seq in waiting:
+                _, url, record, error = waiting.pop(next_seq)
+                next_seq += 1
+                in_flight.release()
+                if error:
+                    print(f"❌ Failed to scrape {url}: {error}")
+                    metrics.record_error("ad", error)
+                    continue
+                start = time.monotonic()
+                on_record(record)
+                write_stats.busy += time.monotonic() - start
+                write_stats.items += 1
+
+    async def monitor():
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            print(f"📊 {stats.line()}")
+
+    async def feed():
+        # jobs in, then end markers stage by stage once each one has drained
+        await produce()
+        await asyncio.gather(*fetch_tasks)
+        for _ in parse_tasks:
+            await html_q.put(None)
+        await asyncio.gather(*parse_tasks)
+        await record_q.put(None)
+
+    monitor_task = asyncio.create_task(monitor())
+    writer = asyncio.create_task(write_stage())
+    fetch_tasks = [asyncio.create_task(fetch_stage()) for _ in range(fetchers)]
+    parse_tasks = [asyncio.create_task(parse_stage()) for _ in range(parsers)]
+    feeder = asyncio.create_task(feed())
+    tasks = [monitor_task, writer, feeder, *fetch_tasks, *parse_tasks]
+    try:
+        # the writer failing (on_record raised, e.g. CrawlAborted) ends the run
+        # here instead of leaving the producer blocked on in_flight
+        await asyncio.gather(writer, feeder)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run_pipeline(jobs, on_record, fetchers=DEFAULT_FETCHERS, parsers=DEFAULT_PARSERS,
+                 parse_in_processes=True, queue_size=DEFAULT_QUEUE_SIZE) -> PipelineStats:
+    # jobs: iterable of (ad url, dealer_info); on_record(record) in job order
+    stats = PipelineStats()
+    parse_pool = get_parse_pool(parsers, parse_in_processes)
+    asyncio.run(_run(jobs, on_record, fetchers, parsers, parse_pool, queue_size, stats))
+    return stats
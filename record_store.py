@@ -0,0 +1,109 @@
+import itertools
+import sys
+from array import array
+
+# Columns with few distinct values: stored once, rows keep a small integer code
+CATEGORICAL = {
+    "Dealer ID", "Dealer Name", "Dealership Location", "Sales Hours", "Seller Email", "Dealer Contact Number",
+    "Status", "Body", "Fuel Type", "Engine CC / kw", "Year of Manufacture", "Transmission", "Grade",
+    "Exterior Color", "Interior Color", "No. of Owners", "District", "City", "Year of Reg.",
+    # feature lists repeat across ads of the same trim, so whole lists are interned too
+    "Convenience", "Infotainment", "Safety & Security", "Interior & Seats", "Windows & Lighting",
+    "Other Features",
+}
+
+
+class _CategoricalColumn:
+    __slots__ = ("codes", "values", "index")
+
+    def __init__(self, size):
+        # code 0 is the empty value, so back-filled rows cost nothing extra
+        self.values = [""]
+        self.index = {"": 0}
+        self.codes = array("I", [0]) * size
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            if isinstance(value, str):
+                value = sys.intern(value)
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+
+class _TextColumn:
+    __slots__ = ("items",)
+
+    def __init__(self, size):
+        self.items = [""] * size
+
+    def append(self, value):
+        self.items.append(value)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+# --------------------------
+# Columnar record store: same records, a fraction of the dict-per-ad memory
+# --------------------------
+class RecordStore:
+    # Drop-in for a list of record dicts: append/extend records, iterate dicts,
+    # or get rows in any header order straight from the columns (rows()).
+    def __init__(self, records=()):
+        self._columns = {}
+        self._size = 0
+        self.extend(records)
+
+    def append(self, record: dict):
+        columns = self._columns
+        for key in record.keys() - columns.keys():
+            kind = _CategoricalColumn if key in CATEGORICAL else _TextColumn
+            columns[key] = kind(self._size)
+        for key, column in columns.items():
+            column.append(record.get(key, ""))
+        self._size += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __getitem__(self, i) -> dict:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("record index out of range")
+        return {key: column[i] for key, column in self._columns.items()}
+
+    def __iter__(self):
+        keys = list(self._columns)
+        for values in zip(*self._columns.values()):
+            yield dict(zip(keys, values))
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns)
+
+    def column(self, name):
+        column = self._columns.get(name)
+        return iter(column) if column is not None else itertools.repeat("", self._size)
+
+    def rows(self, headers):
+        # value tuples in `headers` order, without building a dict per record
+        return zip(*(self.column(h) for h in headers))
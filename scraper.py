@@ -0,0 +1,154 @@
+import os
+import metrics
+from dealer_registry import dealer_id, get_dealer_registry, learn_missing
+from delta import REMOVED
+from extraction import extract_dealer_info_from_dealer_page, extract_dealer_links, extract_vehicle
+from fetcher import DEFAULT_WORKERS, fetch_ordered
+from http_client import fetch
+from listings import DEFAULT_LISTING_MODE, collect_dealer_listings
+from page_cache import PageCache, get_page_cache
+from parse_health import sample_if_broken
+from parsing import AD_PAGE_STRAINER, make_soup
+from record_store import RecordStore
+
+# AUTOSTREAM_BASE_URL points the crawl elsewhere (e.g. the offline replay server)
+BASE_URL = os.environ.get("AUTOSTREAM_BASE_URL", "https://autostream.lk").rstrip("/")
+
+
+# --------------------------
+# Ad page stages: fetch (I/O) and parse (CPU), usable separately
+# --------------------------
+def fetch_vehicle_page(url):
+    # (response, None) for a fresh page, (None, cache entry) when the server answered 304
+    cache = get_page_cache()
+    entry = cache.lookup(url) if cache else None
+    response = fetch(url, headers=PageCache.conditional_headers(entry))
+    if entry and response.status_code == 304:
+        return None, entry
+    # retries used up on a 429/5xx, or a 404: an error page, not an ad to parse
+    response.raise_for_status()
+    return response, None
+
+
+def parse_vehicle_page(html, url, dealer_info):
+    # top-level so process pools can pickle it
+    return extract_vehicle(make_soup(html, AD_PAGE_STRAINER), url, dealer_info)
+
+
+# --------------------------
+# Scrape single vehicle ad
+# --------------------------
+def scrape_vehicle(url, dealer_info):
+    print(f"🔹 Scraping vehicle: {url}")
+    response, entry = fetch_vehicle_page(url)
+    cache = get_page_cache()
+    if entry:
+        return cache.reuse(url, entry, dealer_info)
+
+    with metrics.timed("parse"):
+        data = parse_vehicle_page(response.text, url, dealer_info)
+    # key fields empty: keep the raw page to see what the markup turned into
+    sample_if_broken(url, data, response.text)
+    learn_missing(dealer_info, data)
+    if cache:
+        cache.store(url, response, data)
+    return data
+
+
+# --------------------------
+# One dealer's info + ad URLs (absolute, page order, no duplicates)
+# + ad URL -> listing card fingerprint
+# --------------------------
+def resolve_dealer(dealer_url, listing_mode=DEFAULT_LISTING_MODE, listing=None):
+    # listing = (soup, ad_links, cards) when the dealer page was already expanded
+    soup, ad_links, cards = listing or collect_dealer_listings(dealer_url, listing_mode)
+    registry = get_dealer_registry()
+    with metrics.timed("dealer_info"):
+        if registry:
+            dealer_info = registry.resolve(dealer_url, soup)
+        else:
+            dealer_info = {"Dealer ID": dealer_id(dealer_url), **extract_dealer_info_from_dealer_page(soup)}
+
+    ad_links = list(dict.fromkeys(ad_links))
+    print(f"🔎 Found {len(ad_links)} ads for dealer {dealer_info.get('Dealer Name', '')}")
+    ad_urls = [u if u.startswith("http") else BASE_URL + u for u in ad_links]
+    fingerprints = {u if u.startswith("http") else BASE_URL + u: fp for u, fp in cards.items()}
+    return dealer_info, ad_urls, fingerprints
+
+
+# --------------------------
+# Scrape all ads from one dealer (dealer info scraped once)
+# --------------------------
+def scrape_dealer(dealer_url, workers=DEFAULT_WORKERS, listing_mode=DEFAULT_LISTING_MODE,
+                  listing=None, include_dealer_row=False, skip_ads=(), on_ad=None, pipeline=False, delta=None,
+                  parse_in_processes=True):
+    # Records are returned in a columnar RecordStore, or handed to on_ad
+    # one by one (and not kept) when streaming
+    ads = RecordStore()
+    emit = on_ad or ads.append
+    scraped = 0
+    registry = get_dealer_registry()
+    dealer_info, ad_urls, fingerprints = resolve_dealer(dealer_url, listing_mode, listing)
+
+    if include_dealer_row and dealer_url not in skip_ads:
+        # dealer-only row, Ad URL pointing at the dealer page (journaled like an ad,
+        # so a resumed run doesn't write it twice)
+        emit({**dealer_info, "Ad URL": dealer_url})
+
+    # Scrape each ad (bounded concurrency, results kept in link order);
+    # skip_ads holds ads already finished by an earlier, interrupted run
+    pending = [u for u in ad_urls if u not in skip_ads]
+
+    # delta run: only ads that are new or whose listing card changed get scraped
+    if delta is not None:
+        changes = delta.compare(dealer_url, fingerprints)
+        pending = [u for u in pending if u in changes]
+        print(f"🔁 Delta: {len(pending)} new/changed, {len(ad_urls) - len(pending)} unchanged, "
+              f"{sum(c == REMOVED for c in changes.values())} removed")
+        done = set()
+
+        def emit(record, _emit=emit):
+            done.add(record.get("Ad URL"))
+            _emit(record)
+
+    if pipeline:
+        # staged fetch/parse/write; imported here because pipeline builds on this module
+        from pipeline import run_pipeline
+        stats = run_pipeline([(u, dealer_info) for u in pending], emit, fetchers=workers,
+                             parse_in_processes=parse_in_processes)
+        stats.report()
+        scraped = stats.stages["write"].items
+    else:
+        for ad_url, ad_data, error in fetch_ordered(pending, lambda u: scrape_vehicle(u, dealer_info), workers):
+            if error:
+                print(f"❌ Failed to scrape {ad_url}: {error}")
+                metrics.record_error("ad", error)
+            else:
+                emit(ad_data)
+                scraped += 1
+
+    if delta is not None:
+        delta.update(dealer_url, fingerprints, changes, failed=set(pending) - done)
+    if registry:
+        # keep dealer fields the ad pages filled in for the next run
+        registry.update(dealer_url, dealer_info)
+    metrics.count("ads_scraped", scraped)
+    metrics.count("dealers_scraped")
+    print(f"✅ Total ads scraped: {scraped}")
+    return ads
+
+
+# --------------------------
+# Get all dealers
+# --------------------------
+def get_dealers():
+    url = f"{BASE_URL}/dealers/"
+    response = fetch(url)
+    response.raise_for_status()
+    soup = make_soup(response.text)
+
+    dealers = []
+    for dealer_name, dealer_url in extract_dealer_links(soup):
+        print(f"📌 Dealer found: {dealer_name} -> {dealer_url}")
+        dealers.append(dealer_url)
+    return dealers
@@ -0,0 +1,290 @@
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_QUEUE_PATH = "crawl_queue.sqlite"
+DEFAULT_BROKER_PORT = 8765
+DEFAULT_BROKER_HOST = "127.0.0.1"
+# Shared secret every broker request must carry (Authorization: Bearer <token>)
+TOKEN_ENV = "AUTOSTREAM_QUEUE_TOKEN"
+# Seconds a leased task stays invisible before another worker may take it
+DEFAULT_VISIBILITY = 300.0
+# A task that failed (or whose worker vanished) this many times is given up on
+MAX_ATTEMPTS = 3
+# Result rows read per fetch when exporting
+RESULT_BATCH_ROWS = 500
+
+DEALER = "dealer"
+AD = "ad"
+
+
+# --------------------------
+# SQLite work queue: tasks with leases, results keyed by Ad URL
+# --------------------------
+class WorkQueue:
+    # Tasks are (kind, url) pairs; enqueueing one twice is a no-op, so a
+    # coordinator or worker that retries never duplicates work.
+    def __init__(self, path=DEFAULT_QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id INTEGER PRIMARY KEY, kind TEXT, url TEXT, payload TEXT,"
+            " dealer_seq INTEGER, seq INTEGER, state TEXT DEFAULT 'ready', attempts INTEGER DEFAULT 0,"
+            " token TEXT, worker TEXT, lease_until REAL, error TEXT, UNIQUE (kind, url))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, lease_until)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " ad_url TEXT PRIMARY KEY, dealer_seq INTEGER, seq INTEGER, record TEXT, worker TEXT, stored_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_order ON results (dealer_seq, seq)")
+
+    def enqueue(self, tasks) -> int:
+        # tasks: dicts with kind, url and optional payload / dealer_seq / seq
+        rows = [(t["kind"], t["url"], json.dumps(t.get("payload") or {}, ensure_ascii=False),
+                 t.get("dealer_seq", 0), t.get("seq", 0)) for t in tasks]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tasks (kind, url, payload, dealer_seq, seq) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            return self._conn.total_changes - before
+
+    def lease(self, worker, limit=1, visibility=DEFAULT_VISIBILITY):
+        # -> (tasks, drained); expired leases of crashed workers are handed out again.
+        # Dealer tasks go first so ad tasks keep flowing in behind them.
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE tasks SET state = 'failed', error = 'lease expired too often'"
+                    " WHERE state = 'leased' AND lease_until < ? AND attempts >= ?", (now, MAX_ATTEMPTS)
+                )
+                rows = self._conn.execute(
+                    "SELECT id, kind, url, payload, dealer_seq, seq FROM tasks"
+                    " WHERE state = 'ready' OR (state = 'leased' AND lease_until < ?)"
+                    " ORDER BY kind = 'ad', dealer_seq, seq LIMIT ?", (now, limit)
+                ).fetchall()
+                tasks = []
+                for task_id, kind, url, payload, dealer_seq, seq in rows:
+                    token = uuid.uuid4().hex
+                    self._conn.execute(
+                        "UPDATE tasks SET state = 'leased', attempts = attempts + 1, token = ?, worker = ?,"
+                        " lease_until = ? WHERE id = ?", (token, worker, now + visibility, task_id)
+                    )
+                    tasks.append({"token": token, "kind": kind, "url": url, "payload": json.loads(payload),
+                                  "dealer_seq": dealer_seq, "seq": seq})
+                open_tasks = self._conn.execute(
+                    "SELECT COUNT(*) FROM tasks WHERE state IN ('ready', 'leased')"
+                ).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return tasks, open_tasks == 0
+
+    def ack(self, tokens) -> int:
+        # a token from a lease that expired and was re-leased no longer matches
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "UPDATE tasks SET state = 'done', token = NULL WHERE token = ? AND state = 'leased'",
+                [(t,) for t in tokens],
+            )
+            return self._conn.total_changes - before
+
+    def fail(self, tokens, error=""):
+        # back to ready for another attempt, or failed for good after MAX_ATTEMPTS
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'ready' END,"
+                " token = NULL, error = ? WHERE token = ? AND state = 'leased'",
+                [(MAX_ATTEMPTS, str(error)[:500], t) for t in tokens],
+            )
+
+    def put_results(self, results, worker=""):
+        # results: dicts with record, dealer_seq, seq; upserted by Ad URL,
+        # so a task processed twice still leaves one row
+        now = time.time()
+        rows = [(r["record"]["Ad URL"], r.get("dealer_seq", 0), r.get("seq", 0),
+                 json.dumps(r["record"], ensure_ascii=False), worker, now) for r in results]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (ad_url) DO UPDATE SET"
+                " dealer_seq = excluded.dealer_seq, seq = excluded.seq, record = excluded.record,"
+                " worker = excluded.worker, stored_at = excluded.stored_at", rows
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state"))
+            results = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"ready": 0, "leased": 0, "done": 0, "failed": 0, **counts, "results": results}
+
+    def iter_results(self):
+        # records in crawl order: dealer by dealer, ads in link order; streamed
+        # in batches over a separate connection, so memory stays flat and the
+        # queue is not locked for the whole export
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute("SELECT record FROM results ORDER BY dealer_seq, seq")
+            while rows := cursor.fetchmany(RESULT_BATCH_ROWS):
+                for (record,) in rows:
+                    yield json.loads(record)
+        finally:
+            conn.close()
+
+    def failures(self) -> list:
+        with self._lock:
+            return self._conn.execute("SELECT kind, url, error FROM tasks WHERE state = 'failed'").fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --------------------------
+# Broker: the queue over HTTP/JSON, for workers on other machines
+# --------------------------
+class _BrokerHandler(BaseHTTPRequestHandler):
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        # workers can make the crawl fetch any URL and add rows, so every call needs the token
+        expected = f"Bearer {self.server.token}".encode("utf-8")
+        given = self.headers.get("Authorization", "").encode("utf-8")
+        if hmac.compare_digest(given, expected):
+            return True
+        self._reply({"error": "unauthorized"}, 401)
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == "/stats":
+            self._reply(self.server.queue.stats())
+        else:
+            self._reply({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        queue = self.server.queue
+        data = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if self.path == "/lease":
+            tasks, drained = queue.lease(data["worker"], data.get("limit", 1),
+                                         data.get("visibility", DEFAULT_VISIBILITY))
+            self._reply({"tasks": tasks, "drained": drained})
+        elif self.path == "/ack":
+            self._reply({"acked": queue.ack(data["tokens"])})
+        elif self.path == "/fail":
+            queue.fail(data["tokens"], data.get("error", ""))
+            self._reply({})
+        elif self.path == "/enqueue":
+            self._reply({"added": queue.enqueue(data["tasks"])})
+        elif self.path == "/results":
+            queue.put_results(data["results"], data.get("worker", ""))
+            self._reply({})
+        else:
+            self._reply({"error": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def new_token() -> str:
+    return secrets.token_urlsafe(24)
+
+
+class QueueBroker:
+    def __init__(self, queue: WorkQueue, token, host=DEFAULT_BROKER_HOST, port=DEFAULT_BROKER_PORT):
+        if not token:
+            raise ValueError("the broker needs a token")
+        self._server = ThreadingHTTPServer((host, port), _BrokerHandler)
+        self._server.daemon_threads = True
+        self._server.queue = queue
+        self._server.token = token
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class RemoteQueue:
+    # Same calls as WorkQueue, sent to a QueueBroker. Broker traffic uses its
+    # own session, outside the site's rate limiter and fetch metrics.
+    def __init__(self, url, token=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.url = url.rstrip("/")
+        self._session = requests.Session()
+        retry = Retry(total=5, backoff_factor=0.5, allowed_methods=None, status_forcelist=(502, 503, 504))
+        self._session.mount("http://", HTTPAdapter(max_retries=retry))
+        self._session.mount("https://", HTTPAdapter(max_retries=retry))
+        token = token or os.environ.get(TOKEN_ENV)
+        if not token:
+            raise ValueError(f"a broker token is needed (--token or {TOKEN_ENV})")
+        self._session.headers["Authorization"] = f"Bearer {token}"
+
+    def _post(self, path, payload):
+        response = self._session.post(self.url + path, json=payload, timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def enqueue(self, tasks) -> int:
+        return self._post("/enqueue", {"tasks": list(tasks)})["added"]
+
+    def lease(self, worker, limit=1, visibility=DEFAULT_VISIBILITY):
+        reply = self._post("/lease", {"worker": worker, "limit": limit, "visibility": visibility})
+        return reply["tasks"], reply["drained"]
+
+    def ack(self, tokens) -> int:
+        return self._post("/ack", {"tokens": list(tokens)})["acked"]
+
+    def fail(self, tokens, error=""):
+        self._post("/fail", {"tokens": list(tokens), "error": str(error)[:500]})
+
+    def put_results(self, results, worker=""):
+        self._post("/results", {"results": list(results), "worker": worker})
+
+    def stats(self) -> dict:
+        response = self._session.get(self.url + "/stats", timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self._session.close()
+
+
+def open_queue(target, token=None):
+    # a broker URL (http://host:port) or a local queue database path
+    return RemoteQueue(target, token) if target.startswith(("http://", "https://")) else WorkQueue(target)
@@ -0,0 +1,261 @@
+import csv
+import json
+import os
+import metrics
+from normalize import NORMALIZE_BATCH_ROWS, NUMERIC_TYPES, normalize_batch
+
+PARQUET_BATCH_ROWS = 1000
+# Handled by db_sink (imported lazily, it builds on this module)
+DB_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+# Output column layout shared by every entry point
+HEADERS = [
+    "Dealer ID", "Dealer Name", "Dealership Location", "Sales Hours", "Seller Email", "Dealer Contact Number",
+    "Vehicle Name", "Vehicle Price", "Status", "Contact Number", "Registration Number",
+    "Body", "Mileage", "Fuel Type", "Engine CC / kw", "Year of Manufacture", "Transmission",
+    "Grade", "Exterior Color", "Interior Color", "No. of Owners", "Blue-T Grade",
+    "District", "City", "Year of Reg.", "Convenience", "Infotainment", "Safety & Security",
+    "Interior & Seats", "Windows & Lighting", "Other Features", "Seller Notes", "Ad URL"
+]
+
+
+# --------------------------
+# One interface for every streaming sink
+# --------------------------
+class RecordWriter:
+    # Writes records (dicts) as rows in `headers` order, one at a time.
+    # append=True continues an existing file (e.g. a resumed crawl).
+    def __init__(self, path, headers, append=False):
+        self.path = path
+        self.headers = list(headers)
+        self.append = append
+        self.rows_written = 0
+
+    def row(self, record) -> list:
+        return [record.get(h, "") for h in self.headers]
+
+    def write(self, record):
+        self.write_values(self.row(record))
+
+    def write_values(self, values):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvWriter(RecordWriter):
+    def __init__(self, path, headers, append=False):
+        super().__init__(path, headers, append)
+        existing = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self._fh = open(path, "a" if existing else "w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._fh)
+        if not existing:
+            self._csv.writerow(self.headers)
+
+    def write_values(self, values):
+        self._csv.writerow(values)
+        self.rows_written += 1
+
+    def flush(self):
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+
+class JsonlWriter(RecordWriter):
+    def __init__(self, path, headers, append=False):
+        super().__init__(path, headers, append)
+        self._fh = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write_values(self, values):
+        self._fh.write(json.dumps(dict(zip(self.headers, values)), ensure_ascii=False) + "\n")
+        self.rows_written += 1
+
+    def flush(self):
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+
+class XlsxStreamWriter(RecordWriter):
+    # openpyxl write-only mode: rows go straight to a temp file, memory stays flat.
+    # A write-only workbook can't be reopened, so append is not supported.
+    def __init__(self, path, headers, append=False):
+        if append and os.path.exists(path):
+            raise ValueError("Streaming .xlsx output can't be appended to; use .csv or .jsonl to resume")
+        from openpyxl import Workbook
+
+        super().__init__(path, headers, append)
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet()
+        self._ws.append(self.headers)
+
+    def write_values(self, values):
+        self._ws.append(values)
+        self.rows_written += 1
+
+    def close(self):
+        self._wb.save(self.path)
+
+
+class ParquetWriter(RecordWriter):
+    # Needs pyarrow; rows are buffered into row groups of PARQUET_BATCH_ROWS
+    def __init__(self, path, headers, append=False):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if append and os.path.exists(path):
+            raise ValueError("Parquet output can't be appended to; use .csv or .jsonl to resume")
+        super().__init__(path, headers, append)
+        self._pa = pa
+        arrow_types = {int: pa.int64(), float: pa.float64()}
+        self._schema = pa.schema([(h, arrow_types.get(NUMERIC_TYPES.get(h), pa.string())) for h in self.headers])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._batch = []
+
+    def write_values(self, values):
+        self._batch.append(values)
+        self.rows_written += 1
+        if len(self._batch) >= PARQUET_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        columns = [
+            [None if row[i] in ("", None) else row[i] for row in self._batch] if h in NUMERIC_TYPES
+            else [str(row[i]) for row in self._batch]
+            for i, h in enumerate(self.headers)
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+        self._batch = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+# --------------------------
+# Typed numeric columns: records are normalized in batches, then written
+# --------------------------
+class TypedWriter(RecordWriter):
+    # Wraps another writer whose headers include the typed columns
+    # (normalize.typed_headers); failures collects unparseable raw values.
+    def __init__(self, inner: RecordWriter, batch_rows=NORMALIZE_BATCH_ROWS):
+        super().__init__(inner.path, inner.headers, inner.append)
+        self.inner = inner
+        self.batch_rows = batch_rows
+        self.failures = []
+        self._batch = []
+
+    def write(self, record):
+        self._batch.append(dict(record))
+        if len(self._batch) >= self.batch_rows:
+            self._drain()
+
+    def write_values(self, values):
+        self.write(dict(zip(self.headers, values)))
+
+    def _drain(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        with metrics.timed("normalize"):
+            self.failures.extend(normalize_batch(batch))
+        for record in batch:
+            self.inner.write(record)
+        self.rows_written = self.inner.rows_written
+
+    def flush(self):
+        self._drain()
+        self.inner.flush()
+
+    def close(self):
+        self._drain()
+        self.inner.close()
+
+
+WRITERS = {
+    ".csv": CsvWriter,
+    ".jsonl": JsonlWriter,
+    ".xlsx": XlsxStreamWriter,
+    ".parquet": ParquetWriter,
+}
+
+
+def open_writer(path, headers, append=False) -> RecordWriter:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in DB_EXTENSIONS:
+        from db_sink import SqliteWriter
+        return SqliteWriter(path, headers)
+    if ext not in WRITERS:
+        raise ValueError(f"Unsupported output {path!r}, expected one of {', '.join(WRITERS)} or .sqlite")
+    return WRITERS[ext](path, headers, append)
+
+
+# --------------------------
+# Read rows back from any sink (streaming)
+# --------------------------
+def iter_rows(path, headers):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            # CSV loses the typed columns' types; turn them back into numbers
+            typed = [NUMERIC_TYPES.get(h) for h in headers]
+            for record in csv.DictReader(f):
+                values = [record.get(h, "") for h in headers]
+                yield [kind(v) if kind and v else v for kind, v in zip(typed, values)]
+    elif ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield [record.get(h, "") for h in headers]
+    elif ext == ".xlsx":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        file_headers = list(next(rows, []))
+        for values in rows:
+            record = dict(zip(file_headers, values))
+            yield ["" if record.get(h) is None else record[h] for h in headers]
+        wb.close()
+    elif ext in DB_EXTENSIONS:
+        from db_sink import iter_db_rows
+        yield from iter_db_rows(path, headers)
+    elif ext == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches():
+            for record in batch.to_pylist():
+                yield [record.get(h, "") for h in headers]
+    else:
+        raise ValueError(f"Unsupported input {path!r}")
+
+
+# --------------------------
+# Optional final step: merge streamed parts into one .xlsx
+# --------------------------
+def merge_to_xlsx(sources, file_name, headers):
+    # Rows already in file_name are kept (same as the old append behaviour),
+    # then every source is streamed in; the header row is rewritten to `headers`.
+    tmp_name = file_name + ".tmp.xlsx"
+    with XlsxStreamWriter(tmp_name, headers) as out:
+        inputs = ([file_name] if os.path.exists(file_name) else []) + list(sources)
+        for path in inputs:
+            for values in iter_rows(path, headers):
+                out.write_values(values)
+    os.replace(tmp_name, file_name)
+    return out.rows_written